@@ -1,14 +1,30 @@
 from abc import ABC, abstractmethod
 from enum import Enum
 from collections import deque
+from collections.abc import Iterator
+from time import perf_counter
 import heapq
 
 from state import State
+from bitboard import UNREACHABLE, Board, SearchState
 from commands import MoveCommand
+from compact import (
+    MOVE_BYTES,
+    NO_MOVE,
+    BucketQueue,
+    FingerprintTable,
+    MemoryBudget,
+    SpillQueue,
+    board_cache_size,
+    fingerprint,
+)
+from instrumentation import Instrumentation
 from position import Position
 
 
 INF = 1_000_000_000
+# in-memory frontier of the compact solvers, in bytes
+FRONTIER_BUDGET = 256 << 20
 
 
 class Algorithms(Enum):
@@ -17,9 +33,111 @@ class Algorithms(Enum):
     UCS = "ucs"
     HILL_CLIMB = "hill_climb"
     A_STAR = "a_star"
+    IDA_STAR = "ida_star"
+    BFS_COMPACT = "bfs_compact"
+    A_STAR_COMPACT = "a_star_compact"
+    BFS_PARALLEL = "bfs_parallel"
+    PORTFOLIO = "portfolio"
+    PORTFOLIO_OPTIMAL = "portfolio_optimal"
 
 
 class Algorithm(ABC):
+    # set from another thread to stop the search at its next step
+    cancelled: bool = False
+    frontier_size: int = 0
+    board: Board | None = None
+    # attach an Instrumentation before the search to measure it
+    instrumentation: Instrumentation | None = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def get_frontier_size(self) -> int:
+        return self.frontier_size
+
+    def expand(self, node: SearchState, **kwargs) -> tuple[State, list[Position]]:
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.step(self)
+            start = perf_counter()
+        state = node.to_state()
+        moves = state.get_possible_moves(
+            state.player.position, check_blocks=False, **kwargs
+        )
+        moves = self.prune_moves(node, state, moves)
+        if instrumentation is not None:
+            instrumentation.add("expand", perf_counter() - start)
+        return state, moves
+
+    def prune_moves(
+        self, node: SearchState, state: State, moves: list[Position]
+    ) -> list[Position]:
+        """
+        Drop the moves the lava forecast shows lead nowhere: into a cell
+        lava or a stone takes that turn, or somewhere the player can no
+        longer reach every point and the goal from. Pushes change the
+        forecast, so they are always kept.
+        """
+        board = self.board
+        forecast, turn = board.forecast(node, state)
+        points = node.points
+        kept = []
+        for move in moves:
+            target = node.player + int(move.x) + int(move.y) * board.width
+            if node.blocks >> target & 1 or not forecast.is_doomed(
+                target, points & ~(1 << target), turn + 1
+            ):
+                kept.append(move)
+        return kept
+
+    def apply_move(self, state: State, move: Position) -> SearchState:
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            new_state = state.copy(shared=True)
+            MoveCommand(new_state, new_state.player, move).run()
+            return self.board.pack(new_state)
+
+        start = perf_counter()
+        new_state = state.copy(shared=True)
+        copied = perf_counter()
+        MoveCommand(new_state, new_state.player, move).run()
+        simulated = perf_counter()
+        node = self.board.pack(new_state)
+        instrumentation.add("copy", copied - start)
+        instrumentation.add("simulate", simulated - copied)
+        instrumentation.add("pack", perf_counter() - simulated)
+        instrumentation.generated += 1
+        return node
+
+    def is_dead(self, node: SearchState) -> bool:
+        # checked on every child before it is looked up or queued
+        if not self.board.is_dead(node):
+            return False
+        if self.instrumentation is not None:
+            self.instrumentation.dead += 1
+        return True
+
+    def duplicate_hit(self):
+        # a generated child was already known to the search
+        if self.instrumentation is not None:
+            self.instrumentation.duplicates += 1
+
+    def heap_push(self, heap: list, item):
+        if self.instrumentation is None:
+            heapq.heappush(heap, item)
+            return
+        start = perf_counter()
+        heapq.heappush(heap, item)
+        self.instrumentation.add("heap", perf_counter() - start)
+
+    def heap_pop(self, heap: list):
+        if self.instrumentation is None:
+            return heapq.heappop(heap)
+        start = perf_counter()
+        item = heapq.heappop(heap)
+        self.instrumentation.add("heap", perf_counter() - start)
+        return item
+
     @abstractmethod
     def get_nodes(self) -> int:
         pass
@@ -38,38 +156,84 @@ class Algorithm(ABC):
 
 
 class DFS(Algorithm):
-    def __init__(self):
-        self.visited: dict[State, bool] = {}
+    """
+    Depth-first search with an explicit stack.
+
+    Each stack entry holds the move into a node and an iterator over its
+    packed children, so memory grows with the current path rather than
+    with Python frames and unpacked States. Children are tested against
+    the visited set only when the search gets to them, giving the same
+    visiting order as a recursive DFS. With `depth_limit`, nodes at that
+    depth are visited but not expanded, and a node reached again at a
+    shallower depth than before is searched again, so that no solution
+    within the limit is missed.
+    """
+
+    def __init__(self, depth_limit: int | None = None):
+        # node -> shallowest depth it was visited at
+        self.visited: dict[SearchState, int] = {}
         self.nodes: int = 0
         self.visited_count: int = 0
         self.path: deque[Position] = deque()
+        self.board: Board | None = None
+        self.depth_limit = depth_limit
+
+    def mark_as_visited(self, state: SearchState, depth: int):
+        self.visited[state] = depth
+
+    def is_visited(self, state: SearchState, depth: int) -> bool:
+        seen = self.visited.get(state)
+        if seen is None:
+            return False
+        return self.depth_limit is None or seen <= depth
+
+    def check(self, state: SearchState, depth: int):
+        if self.is_dead(state):
+            return False
+        if self.is_visited(state, depth):
+            self.duplicate_hit()
+            return False
+        return state.status in ["alive", "won"]
+
+    def visit(self, node: SearchState, depth: int) -> bool:
+        self.nodes += 1
+        self.visited_count += 1
+        self.mark_as_visited(node, depth)
+        return node.is_won()
 
-    def mark_as_visited(self, state: State):
-        self.visited[state] = True
-
-    def check(self, state: State):
-        return state not in self.visited and state.player.status in ["alive", "won"]
-
-    def apply_move(self, state: State, move: Position):
-        new_state = state.copy()
-        MoveCommand(new_state, new_state.player, move).run()
-        return new_state
+    def children(self, node: SearchState):
+        state, moves = self.expand(node)
+        return iter([(move, self.apply_move(state, move)) for move in moves])
 
     def __call__(self, state: State):
-        self.nodes += 1
-        self.visited_count += 1
-        self.mark_as_visited(state)
+        self.board = Board(state)
+        return self.search(self.board.pack(state))
 
-        if state.is_won():
+    def search(self, root: SearchState):
+        if self.cancelled:
+            return False
+        if self.visit(root, 0):
             return True
 
-        for move in state.get_possible_moves(state.player.position, check_blocks=False):
-            new_state = self.apply_move(state, move)
-            if self.check(new_state):
-                result = self(new_state)
-                if result:
-                    self.path.appendleft(move)
-                    return True
+        stack: list[tuple[Position | None, Iterator]] = [(None, self.children(root))]
+        while stack and not self.cancelled:
+            self.frontier_size = len(stack)
+            # the stack holds the root and every node down to the parent
+            depth = len(stack)
+            for move, child in stack[-1][1]:
+                if self.check(child, depth):
+                    break
+            else:
+                stack.pop()
+                continue
+
+            if self.visit(child, depth):
+                self.path = deque(entry[0] for entry in stack[1:])
+                self.path.append(move)
+                return True
+
+            if self.depth_limit is None or depth < self.depth_limit:
+                stack.append((move, self.children(child)))
 
         return False
 
@@ -85,42 +249,51 @@ class DFS(Algorithm):
 
 class BFS(Algorithm):
     def __init__(self):
-        self.parent: dict[State, tuple[State | None, Position | None]] = {}
-        self.visited: dict[State, bool] = {}
+        self.parent: dict[SearchState, tuple[SearchState | None, Position | None]] = {}
+        self.visited: dict[SearchState, bool] = {}
         self.nodes: int = 0
         self.visited_count: int = 0
-        self.won_state: State | None = None
+        self.won_state: SearchState | None = None
+        self.board: Board | None = None
 
-    def mark_as_visited(self, state: State):
+    def mark_as_visited(self, state: SearchState):
         self.visited[state] = True
 
-    def set_parent(self, state: State, parent: State | None, move: Position | None):
+    def set_parent(
+        self,
+        state: SearchState,
+        parent: SearchState | None,
+        move: Position | None,
+    ):
         self.parent[state] = (parent, move)
 
-    def check(self, state: State):
-        return state not in self.visited and state.player.status in ["alive", "won"]
-
-    def apply_move(self, state: State, move: Position):
-        new_state = state.copy()
-        MoveCommand(new_state, new_state.player, move).run()
-        return new_state
+    def check(self, state: SearchState):
+        if self.is_dead(state):
+            return False
+        if state in self.visited:
+            self.duplicate_hit()
+            return False
+        return state.status in ["alive", "won"]
 
     def __call__(self, state: State):
-        queue: deque[State] = deque()
-        queue.append(state)
-        self.set_parent(state, None, None)
+        self.board = Board(state)
+        root = self.board.pack(state)
+        queue: deque[SearchState] = deque()
+        queue.append(root)
+        self.set_parent(root, None, None)
         self.nodes += 1
         self.visited_count += 1
-        self.mark_as_visited(state)
-        while queue:
-            current_state = queue.popleft()
+        self.mark_as_visited(root)
+        while queue and not self.cancelled:
+            self.frontier_size = len(queue)
+            current_node = queue.popleft()
             self.visited_count += 1
-            pos = current_state.player.position
-            for move in current_state.get_possible_moves(pos, check_blocks=False):
+            current_state, moves = self.expand(current_node)
+            for move in moves:
                 new_state = self.apply_move(current_state, move)
                 if self.check(new_state):
                     queue.append(new_state)
-                    self.set_parent(new_state, current_state, move)
+                    self.set_parent(new_state, current_node, move)
                     self.nodes += 1
                     self.mark_as_visited(new_state)
                     if new_state.is_won():
@@ -146,62 +319,71 @@ class BFS(Algorithm):
 
 class UCS(Algorithm):
     def __init__(self):
-        self.parent: dict[State, tuple[State | None, Position | None]] = {}
-        self.visited: dict[State, bool] = {}
-        self.distance: dict[State, int] = {}
+        self.parent: dict[SearchState, tuple[SearchState | None, Position | None]] = {}
+        self.visited: dict[SearchState, bool] = {}
+        self.distance: dict[SearchState, int] = {}
         self.nodes: int = 0
         self.visited_count: int = 0
-        self.won_state: State | None = None
+        self.won_state: SearchState | None = None
+        self.board: Board | None = None
 
-    def is_visited(self, state: State):
+    def is_visited(self, state: SearchState):
         return state in self.visited
 
-    def mark_as_visited(self, state: State):
+    def mark_as_visited(self, state: SearchState):
         self.visited[state] = True
 
-    def update_cost(self, state: State, cost: int):
+    def update_cost(self, state: SearchState, cost: int):
         self.distance[state] = cost
 
-    def check_cost(self, state: State, cost: int):
-        return self.distance.get(state, INF) > cost and state.player.status != "dead"
+    def check_cost(self, state: SearchState, cost: int):
+        if self.is_dead(state):
+            return False
+        known = self.distance.get(state, INF)
+        if known != INF:
+            self.duplicate_hit()
+        return known > cost and state.status != "dead"
 
-    def set_parent(self, state: State, parent: State | None, move: Position | None):
+    def set_parent(
+        self,
+        state: SearchState,
+        parent: SearchState | None,
+        move: Position | None,
+    ):
         self.parent[state] = (parent, move)
 
-    def apply_move(self, state: State, move: Position):
-        new_state = state.copy()
-        MoveCommand(new_state, new_state.player, move).run()
-        return new_state
-
     def __call__(self, state: State):
-        heap: list[tuple[int, State]] = []
-        heapq.heappush(heap, (0, state))
-        self.set_parent(state, None, None)
-        self.update_cost(state, 0)
+        self.board = Board(state)
+        root = self.board.pack(state)
+        heap: list[tuple[int, SearchState]] = []
+        self.heap_push(heap, (0, root))
+        self.set_parent(root, None, None)
+        self.update_cost(root, 0)
         self.nodes += 1
-        while heap:
-            cost, current_state = heapq.heappop(heap)
+        while heap and not self.cancelled:
+            self.frontier_size = len(heap)
+            cost, current_node = self.heap_pop(heap)
             self.visited_count += 1
 
-            if current_state.is_won():
-                self.won_state = current_state
+            if current_node.is_won():
+                self.won_state = current_node
                 return
 
-            if self.is_visited(current_state):
+            if self.is_visited(current_node):
                 continue
 
-            self.mark_as_visited(current_state)
-            self.update_cost(current_state, cost)
+            self.mark_as_visited(current_node)
+            self.update_cost(current_node, cost)
 
-            pos = current_state.player.position
-            for move in current_state.get_possible_moves(pos, check_blocks=False):
+            current_state, moves = self.expand(current_node)
+            for move in moves:
                 new_state = self.apply_move(current_state, move)
-                new_cost = cost + len(new_state.lavas)
+                new_cost = cost + new_state.lava_count()
                 self.nodes += 1
                 if self.check_cost(new_state, new_cost):
-                    heapq.heappush(heap, (new_cost, new_state))
+                    self.heap_push(heap, (new_cost, new_state))
                     self.update_cost(new_state, new_cost)
-                    self.set_parent(new_state, current_state, move)
+                    self.set_parent(new_state, current_node, move)
 
     def get_nodes(self) -> int:
         return self.nodes
@@ -221,59 +403,95 @@ class UCS(Algorithm):
 
 
 class HillClimb(Algorithm):
-    def __init__(self):
-        self.visited: dict[State, bool] = {}
-        self.parent: dict[State, tuple[State | None, Position | None]] = {}
+    """
+    Greedy depth-first search that tries the children closest to the goal
+    first, with an explicit stack of per-node heaps in place of recursion.
+    With `depth_limit`, nodes at that depth are visited but not expanded,
+    and a node reached again at a shallower depth is searched again, as in
+    DFS.
+    """
+
+    def __init__(self, depth_limit: int | None = None):
+        # node -> shallowest depth it was visited at
+        self.visited: dict[SearchState, int] = {}
+        self.parent: dict[SearchState, tuple[SearchState | None, Position | None]] = {}
         self.nodes: int = 0
         self.visited_count: int = 0
-        self.won_state: State | None = None
+        self.won_state: SearchState | None = None
+        self.board: Board | None = None
+        self.depth_limit = depth_limit
 
-    def set_parent(self, state: State, parent: State | None, move: Position | None):
+    def set_parent(
+        self,
+        state: SearchState,
+        parent: SearchState | None,
+        move: Position | None,
+    ):
         self.parent[state] = (parent, move)
 
-    def is_visited(self, state: State):
-        return state in self.visited
+    def is_visited(self, state: SearchState, depth: int) -> bool:
+        seen = self.visited.get(state)
+        if seen is None:
+            return False
+        return self.depth_limit is None or seen <= depth
 
-    def mark_as_visited(self, state: State):
-        self.visited[state] = True
+    def mark_as_visited(self, state: SearchState, depth: int):
+        self.visited[state] = depth
 
-    def apply_move(self, state: State, move: Position):
-        new_state = state.copy()
-        MoveCommand(new_state, new_state.player, move).run()
-        return new_state
+    def visit(
+        self,
+        node: SearchState,
+        parent: SearchState | None,
+        move: Position | None,
+        depth: int,
+    ) -> bool:
+        self.nodes += 1
+        self.visited_count += 1
+        self.mark_as_visited(node, depth)
+        self.set_parent(node, parent, move)
+        return node.is_won()
+
+    def children(self, node: SearchState) -> list[tuple[int, SearchState, Position]]:
+        heap: list[tuple[int, SearchState, Position]] = []
+        state, moves = self.expand(node, check_lavas=True)
+        for move in moves:
+            new_state = self.apply_move(state, move)
+            if self.is_dead(new_state):
+                continue
+            c = new_state.heuristic()
+            self.heap_push(heap, (c, new_state, move))
+        return heap
 
     def __call__(self, state: State):
-        self.run(state)
-
-    def run(
-        self,
-        state: State,
-        parent: State | None = None,
-        move: Position | None = None,
-    ):
-        self.mark_as_visited(state)
-        self.set_parent(state, parent, move)
+        self.board = Board(state)
+        self.run(self.board.pack(state))
+
+    def run(self, root: SearchState):
+        if self.cancelled:
+            return False, None
+        if self.visit(root, None, None, 0):
+            return True, root
+
+        stack = [(root, self.children(root))]
+        while stack and not self.cancelled:
+            self.frontier_size = len(stack)
+            node, heap = stack[-1]
+            depth = len(stack)
+            while heap:
+                c, new_state, move = self.heap_pop(heap)
+                if not self.is_visited(new_state, depth):
+                    break
+                self.duplicate_hit()
+            else:
+                stack.pop()
+                continue
 
-        if state.is_won():
-            return True, state
+            if self.visit(new_state, node, move, depth):
+                self.won_state = new_state
+                return True, new_state
 
-        heap: list[tuple[int, State, Position]] = []
-        pos = state.player.position
-        for move in state.get_possible_moves(pos, check_blocks=False, check_lavas=True):
-            new_state = self.apply_move(state, move)
-            c = new_state.manhattan_distance(
-                new_state.player.position,
-                new_state.goal.position,
-            )
-            heapq.heappush(heap, (c, new_state, move))
-
-        while heap:
-            c, new_state, move = heapq.heappop(heap)
-            if not self.is_visited(new_state):
-                is_won, won_state = self.run(new_state, state, move)
-                if is_won:
-                    self.won_state = won_state
-                    return is_won, won_state
+            if self.depth_limit is None or depth < self.depth_limit:
+                stack.append((new_state, self.children(new_state)))
 
         return False, None
 
@@ -296,66 +514,75 @@ class HillClimb(Algorithm):
 
 class AStar(Algorithm):
     def __init__(self):
-        self.visited: dict[State, bool] = {}
-        self.parent: dict[State, tuple[State | None, Position | None]] = {}
-        self.best_cost: dict[State, int] = {}
+        self.visited: dict[SearchState, bool] = {}
+        self.parent: dict[SearchState, tuple[SearchState | None, Position | None]] = {}
+        self.best_cost: dict[SearchState, int] = {}
         self.nodes: int = 0
         self.visited_count: int = 0
-        self.won_state: State | None = None
+        self.won_state: SearchState | None = None
+        self.board: Board | None = None
 
-    def set_parent(self, state: State, parent: State | None, move: Position | None):
+    def set_parent(
+        self,
+        state: SearchState,
+        parent: SearchState | None,
+        move: Position | None,
+    ):
         self.parent[state] = (parent, move)
 
-    def is_visited(self, state: State):
+    def is_visited(self, state: SearchState):
         return state in self.visited
 
-    def mark_as_visited(self, state: State):
+    def mark_as_visited(self, state: SearchState):
         self.visited[state] = True
 
-    def apply_move(self, state: State, move: Position):
-        new_state = state.copy()
-        MoveCommand(new_state, new_state.player, move).run()
-        return new_state
-
-    def check(self, state: State, cost: int):
+    def check(self, state: SearchState, cost: int):
         return state not in self.best_cost or cost < self.best_cost[state]
 
     def __call__(self, state: State):
-        heap: list[tuple[int, State]] = []
-        heapq.heappush(heap, (0, state))
-        self.set_parent(state, None, None)
-        self.best_cost[state] = 0
+        self.board = Board(state)
+        root = self.board.pack(state)
+        heap: list[tuple[int, SearchState]] = []
+        self.heap_push(heap, (0, root))
+        self.set_parent(root, None, None)
+        self.best_cost[root] = 0
         self.nodes += 1
 
-        while heap:
-            _, curr_state = heapq.heappop(heap)
+        while heap and not self.cancelled:
+            self.frontier_size = len(heap)
+            _, curr_node = self.heap_pop(heap)
             self.visited_count += 1
 
-            if curr_state.is_won():
-                self.won_state = curr_state
+            if curr_node.is_won():
+                self.won_state = curr_node
                 return
 
-            if self.is_visited(curr_state):
+            if self.is_visited(curr_node):
                 continue
 
-            self.mark_as_visited(curr_state)
+            self.mark_as_visited(curr_node)
 
-            pos = curr_state.player.position
-            for move in curr_state.get_possible_moves(pos, check_blocks=False):
+            curr_state, moves = self.expand(curr_node)
+            for move in moves:
                 new_state = self.apply_move(curr_state, move)
-                h = new_state.manhattan_distance(
-                    new_state.player.position,
-                    new_state.goal.position,
-                )
+                if self.is_dead(new_state):
+                    continue
+                h = new_state.heuristic()
+                if h >= UNREACHABLE:
+                    # walls and containers cut off the goal or a point
+                    continue
 
                 if self.is_visited(new_state):
+                    self.duplicate_hit()
                     continue
 
-                new_cost = self.best_cost[curr_state] + 1
+                new_cost = self.best_cost[curr_node] + 1
+                if new_state in self.best_cost:
+                    self.duplicate_hit()
                 if self.check(new_state, new_cost):
                     self.best_cost[new_state] = new_cost
-                    self.set_parent(new_state, curr_state, move)
-                    heapq.heappush(heap, (new_cost + h, new_state))
+                    self.set_parent(new_state, curr_node, move)
+                    self.heap_push(heap, (new_cost + h, new_state))
                     self.nodes += 1
 
     def get_nodes(self) -> int:
@@ -373,3 +600,260 @@ class AStar(Algorithm):
                 path.appendleft(move)
             current_state = parent
         return path
+
+
+class IDAStar(Algorithm):
+    """
+    Iterative-deepening A*: repeated depth-first searches bounded by
+    f = moves + heuristic, raising the bound to the smallest f that
+    exceeded it until the goal is reached.
+
+    Only the current path is kept, plus a transposition table of the
+    lowest depth each node was reached at in the current iteration,
+    capped at `max_table_size` entries. Nodes reached again no shallower
+    are skipped, since their subtree was already searched with at least
+    as much budget.
+    """
+
+    def __init__(self, max_table_size: int = 100_000):
+        self.table: dict[SearchState, int] = {}
+        self.max_table_size = max_table_size
+        self.nodes: int = 0
+        self.visited_count: int = 0
+        self.iterations: int = 0
+        self.path: deque[Position] = deque()
+        self.board: Board | None = None
+
+    def remember(self, state: SearchState, depth: int):
+        if len(self.table) < self.max_table_size or state in self.table:
+            self.table[state] = depth
+
+    def children(self, node: SearchState):
+        self.visited_count += 1
+        state, moves = self.expand(node)
+        children = [(move, self.apply_move(state, move)) for move in moves]
+        # most promising first, so the last iteration ends sooner
+        children.sort(key=lambda child: child[1].heuristic())
+        return iter(children)
+
+    def __call__(self, state: State):
+        self.board = Board(state)
+        root = self.board.pack(state)
+        self.nodes += 1
+        if root.is_won():
+            return
+
+        bound = root.heuristic()
+        if bound >= UNREACHABLE:
+            return
+        while not self.cancelled:
+            self.iterations += 1
+            self.table.clear()
+            found, bound = self.search(root, bound)
+            if found or bound == INF:
+                return
+
+    def search(self, root: SearchState, bound: int) -> tuple[bool, int]:
+        """Bounded DFS; returns whether the goal was found and the next bound"""
+        next_bound = INF
+        on_path = {root}
+        stack: list[tuple[SearchState, Position | None, Iterator]] = [
+            (root, None, self.children(root))
+        ]
+        while stack and not self.cancelled:
+            self.frontier_size = len(stack)
+            node, _, children = stack[-1]
+            depth = len(stack)
+            for move, child in children:
+                if self.is_dead(child):
+                    continue
+                if child in on_path or self.table.get(child, INF) <= depth:
+                    self.duplicate_hit()
+                    continue
+                h = child.heuristic()
+                if h >= UNREACHABLE:
+                    continue
+                f = depth + h
+                if f > bound:
+                    next_bound = min(next_bound, f)
+                    continue
+                break
+            else:
+                on_path.discard(node)
+                stack.pop()
+                continue
+
+            self.nodes += 1
+            if child.is_won():
+                self.path = deque(entry[1] for entry in stack[1:])
+                self.path.append(move)
+                return True, bound
+
+            self.remember(child, depth)
+            on_path.add(child)
+            stack.append((child, move, self.children(child)))
+
+        return False, next_bound
+
+    def get_nodes(self) -> int:
+        return self.nodes
+
+    def get_visited_count(self) -> int:
+        return self.visited_count
+
+    def get_path(self) -> deque[Position]:
+        return self.path
+
+
+class CompactBFS(Algorithm):
+    """
+    Breadth-first search for levels too large to hold as SearchStates.
+
+    The visited set keeps only 64-bit fingerprints, each with its parent's
+    fingerprint and a move byte to rebuild the path from, and the queue
+    keeps `frontier_budget` bytes of states in memory and spills the rest
+    to temporary files in `spill_directory`. The Board's caches are
+    sized to an eighth of the budget on top of it. Finds the same path
+    lengths as BFS, unless two states share a fingerprint.
+    """
+
+    def __init__(
+        self,
+        frontier_budget: int = FRONTIER_BUDGET,
+        spill_directory: str | None = None,
+    ):
+        self.closed = FingerprintTable()
+        self.frontier_budget = frontier_budget
+        self.spill_directory = spill_directory
+        self.nodes: int = 0
+        self.visited_count: int = 0
+        self.won: int | None = None
+        self.board: Board | None = None
+
+    def __call__(self, state: State):
+        self.board = Board(state, board_cache_size(state, self.frontier_budget))
+        root = self.board.pack(state)
+        self.closed.add(fingerprint(root), 0, NO_MOVE)
+        self.nodes += 1
+        self.visited_count += 1
+        if root.is_won():
+            self.won = fingerprint(root)
+            return
+
+        queue = SpillQueue(
+            self.board, MemoryBudget(self.frontier_budget), self.spill_directory
+        )
+        queue.append((root,))
+        try:
+            while queue and not self.cancelled:
+                self.frontier_size = len(queue)
+                (current_node,) = queue.popleft()
+                self.visited_count += 1
+                key = fingerprint(current_node)
+                current_state, moves = self.expand(current_node)
+                for move in moves:
+                    new_state = self.apply_move(current_state, move)
+                    if self.is_dead(new_state):
+                        continue
+                    new_key = fingerprint(new_state)
+                    if not self.closed.add(new_key, key, MOVE_BYTES[move]):
+                        self.duplicate_hit()
+                        continue
+                    self.nodes += 1
+                    if new_state.is_won():
+                        self.won = new_key
+                        return
+                    queue.append((new_state,))
+        finally:
+            queue.close()
+
+    def get_nodes(self) -> int:
+        return self.nodes
+
+    def get_visited_count(self) -> int:
+        return self.visited_count
+
+    def get_path(self) -> deque[Position]:
+        if self.won is None:
+            return deque()
+        return self.closed.path_to(self.won)
+
+
+class CompactAStar(Algorithm):
+    """
+    A* with the memory layout of CompactBFS.
+
+    The frontier is a bucket queue over f = moves + heuristic, deepest
+    first within the same f, each bucket spilling to disk under the shared
+    `frontier_budget`. Entries carry their parent's fingerprint and move
+    byte, and a state enters the fingerprint table when it is expanded.
+    The heuristic is consistent, so the first expansion of a state is
+    along a shortest path.
+    """
+
+    def __init__(
+        self,
+        frontier_budget: int = FRONTIER_BUDGET,
+        spill_directory: str | None = None,
+    ):
+        self.closed = FingerprintTable()
+        self.frontier_budget = frontier_budget
+        self.spill_directory = spill_directory
+        self.nodes: int = 0
+        self.visited_count: int = 0
+        self.won: int | None = None
+        self.board: Board | None = None
+
+    def __call__(self, state: State):
+        self.board = Board(state, board_cache_size(state, self.frontier_budget))
+        root = self.board.pack(state)
+        queue = BucketQueue(
+            self.board, MemoryBudget(self.frontier_budget), self.spill_directory
+        )
+        queue.push((root.heuristic(), 0), (root, 0, NO_MOVE, 0))
+        self.nodes += 1
+        try:
+            while queue and not self.cancelled:
+                self.frontier_size = len(queue)
+                _, (current_node, parent, move_byte, cost) = queue.pop()
+                self.visited_count += 1
+                key = fingerprint(current_node)
+                if not self.closed.add(key, parent, move_byte):
+                    self.duplicate_hit()
+                    continue
+
+                if current_node.is_won():
+                    self.won = key
+                    return
+
+                current_state, moves = self.expand(current_node)
+                for move in moves:
+                    new_state = self.apply_move(current_state, move)
+                    if self.is_dead(new_state):
+                        continue
+                    h = new_state.heuristic()
+                    if h >= UNREACHABLE:
+                        continue
+                    if fingerprint(new_state) in self.closed:
+                        self.duplicate_hit()
+                        continue
+                    # deeper entries first among equal f, as they are
+                    # more likely to be nearly there
+                    queue.push(
+                        (cost + 1 + h, -cost - 1),
+                        (new_state, key, MOVE_BYTES[move], cost + 1),
+                    )
+                    self.nodes += 1
+        finally:
+            queue.close()
+
+    def get_nodes(self) -> int:
+        return self.nodes
+
+    def get_visited_count(self) -> int:
+        return self.visited_count
+
+    def get_path(self) -> deque[Position]:
+        if self.won is None:
+            return deque()
+        return self.closed.path_to(self.won)
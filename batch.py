@@ -0,0 +1,166 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from functools import partial
+from multiprocessing.connection import wait
+
+try:
+    import resource
+except ImportError:  # not available on Windows, memory caps are skipped
+    resource = None
+
+from algorithms import Algorithms
+from factories import create_factory
+from instrumentation import Instrumentation
+from portfolio import PortfolioFailed
+from state import State
+
+
+def solve_level(
+    level_file: str,
+    algorithm: Algorithms,
+    track_memory: bool = True,
+    instrument_dir: str | None = None,
+    profile: bool = False,
+    depth_limit: int | None = None,
+) -> dict:
+    """
+    Solve one level with one algorithm; errors are reported, not raised.
+
+    With `instrument_dir`, the search's Instrumentation is saved there as
+    `<level>-<algorithm>.json`, plus a `.pstats` profile with `profile`.
+    `depth_limit` is handed to the algorithms that take one.
+    """
+    record = {"level": level_file, "algorithm": algorithm.value}
+    instrumentation = None
+    if instrument_dir is not None:
+        instrumentation = Instrumentation(profile=profile)
+    try:
+        state = State(level_file)
+        result = create_factory(algorithm, depth_limit=depth_limit).run(
+            state,
+            track_memory=track_memory,
+            instrumentation=instrumentation,
+        )
+    except (
+        OSError,
+        ValueError,
+        RecursionError,
+        MemoryError,
+        PortfolioFailed,
+    ) as error:
+        record["error"] = f"{type(error).__name__}: {error}"
+        return record
+    record.update(result.to_dict())
+
+    if instrumentation is not None:
+        level_name = os.path.splitext(os.path.basename(level_file))[0]
+        prefix = os.path.join(instrument_dir, f"{level_name}-{algorithm.value}")
+        instrumentation.save(prefix + ".json")
+        record["instrumentation"] = prefix + ".json"
+        if profile:
+            instrumentation.dump_stats(prefix + ".pstats")
+            record["profile"] = prefix + ".pstats"
+    return record
+
+
+def limit_memory(memory_limit: int | None):
+    if memory_limit is None or resource is None:
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def run_job(conn, task, level_file, algorithm, memory_limit):
+    limit_memory(memory_limit)
+    record = task(level_file, algorithm)
+    conn.send(record)
+    conn.close()
+
+
+def run_jobs(
+    jobs: list[tuple[str, Algorithms]],
+    workers: int | None = None,
+    timeout: float | None = None,
+    memory_limit: int | None = None,
+    track_memory: bool = True,
+    task=None,
+    instrument_dir: str | None = None,
+    profile: bool = False,
+    depth_limit: int | None = None,
+):
+    """
+    Solve (level, algorithm) jobs in parallel, yielding records as they finish.
+
+    Every job gets its own process so that one that runs past `timeout`
+    seconds can be terminated without holding up the rest. `memory_limit`
+    caps each job's address space in bytes; a job that hits it reports a
+    MemoryError. Records come back in completion order, not job order.
+
+    `task(level_file, algorithm)` produces a job's record and defaults to
+    solve_level; it must be picklable (a module-level function or a partial
+    of one).
+    """
+    workers = workers or os.cpu_count() or 1
+    if task is None:
+        task = partial(
+            solve_level,
+            track_memory=track_memory,
+            instrument_dir=instrument_dir,
+            profile=profile,
+            depth_limit=depth_limit,
+        )
+    pending = deque(jobs)
+    # receiving end of each job's pipe -> (process, job, deadline)
+    running = {}
+
+    while pending or running:
+        while pending and len(running) < workers:
+            level_file, algorithm = job = pending.popleft()
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=run_job,
+                args=(sender, task, level_file, algorithm, memory_limit),
+                # not a daemon, so that solvers can start processes of
+                # their own; every job is joined or terminated below
+                daemon=False,
+            )
+            process.start()
+            sender.close()
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            running[receiver] = (process, job, deadline)
+
+        deadlines = [deadline for _, _, deadline in running.values() if deadline]
+        wait_time = None
+        if deadlines:
+            wait_time = max(0.0, min(deadlines) - time.monotonic())
+
+        for receiver in wait(list(running), timeout=wait_time):
+            process, (level_file, algorithm), _ = running.pop(receiver)
+            try:
+                record = receiver.recv()
+            except EOFError:
+                process.join()
+                record = {
+                    "level": level_file,
+                    "algorithm": algorithm.value,
+                    "error": f"worker exited with code {process.exitcode}",
+                }
+            receiver.close()
+            process.join()
+            yield record
+
+        now = time.monotonic()
+        for receiver, (process, job, deadline) in list(running.items()):
+            if deadline is None or now < deadline:
+                continue
+            del running[receiver]
+            process.terminate()
+            process.join()
+            receiver.close()
+            level_file, algorithm = job
+            yield {
+                "level": level_file,
+                "algorithm": algorithm.value,
+                "error": f"Timeout: no result after {timeout}s",
+            }
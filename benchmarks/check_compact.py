@@ -0,0 +1,161 @@
+"""
+Check the compact solvers where the bundled levels never take them.
+
+Runs CompactBFS and CompactAStar with a frontier budget of a few states
+and a fingerprint table that starts with 16 slots, so that frontiers
+spill to disk, are read back through mmap and the spill segments are
+deleted, and the table grows many times. Each path must be as long as BFS's
+and win when replayed, and every run must actually have spilled and grown.
+CompactBFS must also count the same nodes as BFS: spilling keeps the
+queue first in, first out, so the search order may not change. The spill
+files of a queue may at their peak hold no more than its longest queue's
+worth of records plus two segments, however many states passed through.
+
+    python -m benchmarks.check_compact
+    python -m benchmarks.check_compact levels/level9.txt --budget 500
+
+Exits non-zero if any check fails. Run from the repository root.
+"""
+
+import argparse
+import os
+import sys
+from contextlib import contextmanager
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from algorithms import BFS, CompactAStar, CompactBFS
+from compact import FingerprintTable, SpillQueue
+from portfolio import is_solution
+from solve import find_levels
+from state import State
+
+DEFAULT_LEVELS = ["levels/level3.txt", "levels/level5.txt", "levels/level6.txt"]
+# slots of the fingerprint table each run starts with
+TABLE_CAPACITY = 16
+
+
+@contextmanager
+def counting_refills():
+    """Count the SpillQueue refills in the block, in the yielded list"""
+    refill = SpillQueue.refill
+    counts = [0]
+
+    def counted(self):
+        counts[0] += 1
+        refill(self)
+
+    SpillQueue.refill = counted
+    try:
+        yield counts
+    finally:
+        SpillQueue.refill = refill
+
+
+@contextmanager
+def tracking_spills():
+    """
+    Track the SpillQueue appends in the block: the yielded dict gets the
+    peak bytes on disk and peak length of any one queue, the largest
+    record written and the largest segment size.
+    """
+    append = SpillQueue.append
+    peaks = {"disk": 0, "length": 0, "record": 0, "segment": 0}
+
+    def tracked(self, entry):
+        disk_size = self.disk_size
+        append(self, entry)
+        peaks["disk"] = max(peaks["disk"], self.disk_size)
+        peaks["length"] = max(peaks["length"], len(self))
+        peaks["record"] = max(peaks["record"], self.disk_size - disk_size)
+        peaks["segment"] = max(peaks["segment"], self.segment_size)
+
+    SpillQueue.append = tracked
+    try:
+        yield peaks
+    finally:
+        SpillQueue.append = append
+
+
+def check_level(level_file: str, budget: int) -> list[str]:
+    """Problems of both compact solvers on one level, as messages"""
+    bfs = BFS()
+    bfs(State(level_file))
+    expected = len(bfs.get_path())
+    counts = (bfs.get_nodes(), bfs.get_visited_count())
+
+    problems = []
+    for algorithm_type in (CompactBFS, CompactAStar):
+        name = f"{level_file} {algorithm_type.__name__}"
+        algorithm = algorithm_type(frontier_budget=budget)
+        algorithm.closed = FingerprintTable(TABLE_CAPACITY)
+        with counting_refills() as refills, tracking_spills() as spills:
+            algorithm(State(level_file))
+        path = algorithm.get_path()
+        capacity = len(algorithm.closed.keys)
+        print(
+            f"{name}: path {len(path)} (BFS {expected}), "
+            f"{refills[0]} refills, table grown to {capacity} slots, "
+            f"spill peak {spills['disk']} bytes for {spills['length']} entries",
+            flush=True,
+        )
+
+        if len(path) != expected:
+            problems.append(f"{name}: path {len(path)}, BFS finds {expected}")
+        elif path and not is_solution(State(level_file), path):
+            problems.append(f"{name}: the path does not win")
+        if algorithm_type is CompactBFS and (
+            algorithm.get_nodes(),
+            algorithm.get_visited_count(),
+        ) != counts:
+            problems.append(f"{name}: searched in a different order than BFS")
+        if not refills[0]:
+            problems.append(f"{name}: nothing spilled, lower --budget")
+        disk_limit = spills["length"] * spills["record"] + 2 * spills["segment"]
+        if spills["disk"] > disk_limit:
+            problems.append(
+                f"{name}: spill files reached {spills['disk']} bytes, "
+                f"more than {disk_limit} for a queue of {spills['length']}"
+            )
+        if capacity == TABLE_CAPACITY:
+            problems.append(f"{name}: the fingerprint table never grew")
+    return problems
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check the compact solvers' spilling against BFS"
+    )
+    parser.add_argument(
+        "levels",
+        nargs="*",
+        default=DEFAULT_LEVELS,
+        help="level files or directories of level files (default: levels 3, 5, 6)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=2000,
+        help="frontier budget in bytes, small enough to spill (default: 2000)",
+    )
+    args = parser.parse_args(argv)
+    if args.budget < 1:
+        parser.error("--budget must be at least 1")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    problems = []
+    for level_file in find_levels(args.levels):
+        problems.extend(check_level(level_file, args.budget))
+    for problem in problems:
+        print(f"FAILED {problem}")
+    if problems:
+        return 1
+    print("Compact solvers match BFS")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Check that undo and redo restore states exactly.
+
+Plays seeded random moves on each level the way the UI does (save_state,
+then the move), mixed with runs of undos and redos, and after every step
+compares the live state with the one recorded at that point of the
+timeline: every entity, timer, frontier and the player, plus the Zobrist
+hash, which must also match a full recompute. Undo must stop exactly
+`max_history` moves back, or at the start of the level.
+
+    python -m benchmarks.check_history
+    python -m benchmarks.check_history levels/level10.txt --steps 5000 --max-history 5
+
+Exits non-zero at the first mismatch. Run from the repository root.
+"""
+
+import argparse
+import os
+import random
+import sys
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from cache import describe
+from commands import MoveCommand
+from history import HistoryManager
+from position import MOVE_NAMES
+from solve import find_levels
+from state import State
+
+
+def snapshot(state: State) -> tuple:
+    frontiers = tuple(
+        sorted((int(pos.x), int(pos.y)) for pos in frontier)
+        for frontier in (state.aqua_frontier, state.lava_frontier)
+    )
+    return describe(state), frontiers, state.zobrist
+
+
+def check_level(
+    level_file: str, steps: int, max_history: int | None, rng: random.Random
+) -> str | None:
+    """Play `steps` random moves, undos and redos; returns the first mismatch"""
+    state = State(level_file)
+    history = HistoryManager(max_history, state)
+    moves = list(MOVE_NAMES)
+    # states after each move, the live one, and the oldest undo can reach
+    timeline = [snapshot(state)]
+    position = 0
+    oldest = 0
+
+    # undos and redos come in runs, long enough to reach the oldest move
+    longest = (max_history or 10) + 2
+    action, repeats = "move", 0
+    for step in range(1, steps + 1):
+        if not repeats:
+            roll = rng.random()
+            if state.player.status != "alive" and roll < 0.8 or roll < 0.1:
+                action, repeats = "undo", rng.randint(1, longest)
+            elif roll < 0.2:
+                action, repeats = "redo", rng.randint(1, longest)
+            else:
+                action, repeats = "move", 1
+        repeats -= 1
+
+        if action == "undo":
+            restored = history.undo()
+            if (restored is None) != (position == oldest):
+                return f"{level_file}: step {step} undo stops at the wrong move"
+            position = max(position - 1, oldest)
+        elif action == "redo":
+            restored = history.redo()
+            if (restored is None) != (position == len(timeline) - 1):
+                return f"{level_file}: step {step} redo stops at the wrong move"
+            position = min(position + 1, len(timeline) - 1)
+        else:
+            history.save_state(state)
+            MoveCommand(state, state.player, rng.choice(moves)).run()
+            del timeline[position + 1 :]
+            timeline.append(snapshot(state))
+            position += 1
+            if max_history is not None:
+                oldest = max(oldest, position - max_history)
+
+        if snapshot(state) != timeline[position]:
+            return f"{level_file}: step {step} leaves a different state"
+        if state.zobrist != state.compute_hash():
+            return f"{level_file}: step {step} leaves the hash stale"
+    return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check undo/redo round trips")
+    parser.add_argument(
+        "levels",
+        nargs="*",
+        default=["levels"],
+        help="level files or directories of level files (default: levels)",
+    )
+    parser.add_argument(
+        "--steps", type=int, default=2000, help="moves, undos and redos per level"
+    )
+    parser.add_argument(
+        "--max-history",
+        type=int,
+        default=20,
+        help="moves kept for undo, 0 for unbounded",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the steps")
+    args = parser.parse_args(argv)
+    if args.steps < 1:
+        parser.error("--steps must be at least 1")
+    if args.max_history < 0:
+        parser.error("--max-history must be at least 0")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    max_history = args.max_history or None
+    level_files = find_levels(args.levels)
+    for level_file in level_files:
+        problem = check_level(level_file, args.steps, max_history, rng)
+        if problem is not None:
+            print(f"MISMATCH {problem}")
+            return 1
+        print(f"{level_file}: {args.steps} steps round-trip", flush=True)
+    print(f"Undo and redo are exact on {len(level_files)} levels")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Check that liquids spreading from their active frontier follow the same
+rules as liquids spreading from every cell.
+
+Replays seeded random moves on each level twice: once as the game runs,
+and once with SpreadCommand.take_frontier handing back every liquid cell,
+as the spreads did before frontiers. After every move both states must
+hold the same entities, and each its Zobrist hash must match a full
+recompute. A dead or winning player starts the level over.
+
+    python -m benchmarks.check_spread
+    python -m benchmarks.check_spread levels/level5.txt --steps 5000 --seed 3
+
+Exits non-zero at the first mismatch. Run from the repository root.
+"""
+
+import argparse
+import os
+import random
+import sys
+from contextlib import contextmanager
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from cache import describe
+from commands import MoveCommand, SpreadCommand
+from solve import find_levels
+from state import State
+
+
+def take_everything(self: SpreadCommand) -> list:
+    # every liquid tries to spread, so the frontier only needs clearing
+    current = list(self.liquids.values())
+    if self.frontier:
+        self.frontier = self.state.writable(self.frontier_name, clear=True)
+    return current
+
+
+@contextmanager
+def full_spread():
+    """Make every spread in the block start from all liquid cells"""
+    take_frontier = SpreadCommand.take_frontier
+    SpreadCommand.take_frontier = take_everything
+    try:
+        yield
+    finally:
+        SpreadCommand.take_frontier = take_frontier
+
+
+def check_level(level_file: str, steps: int, rng: random.Random) -> str | None:
+    """Replay `steps` random moves; returns the first mismatch, if any"""
+    frontier = full = None
+    for step in range(1, steps + 1):
+        if frontier is None or frontier.player.status != "alive":
+            frontier = State(level_file)
+            with full_spread():
+                full = State(level_file)
+
+        # mostly keep out of lava, so that walks last long enough for
+        # timers to run out
+        moves = frontier.get_possible_moves(
+            frontier.player.position, check_blocks=False, check_lavas=rng.random() < 0.9
+        )
+        if not moves:
+            frontier = None
+            continue
+        move = rng.choice(moves)
+        MoveCommand(frontier, frontier.player, move).run()
+        with full_spread():
+            MoveCommand(full, full.player, move).run()
+
+        if describe(frontier) != describe(full):
+            return f"{level_file}: move {step} leaves the states different"
+        for name, state in (("frontier", frontier), ("full", full)):
+            if state.zobrist != state.compute_hash():
+                return f"{level_file}: move {step} leaves the {name} hash stale"
+    return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compare frontier spreading against spreading from every cell"
+    )
+    parser.add_argument(
+        "levels",
+        nargs="*",
+        default=["levels"],
+        help="level files or directories of level files (default: levels)",
+    )
+    parser.add_argument(
+        "--steps", type=int, default=2000, help="random moves per level"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the moves")
+    args = parser.parse_args(argv)
+    if args.steps < 1:
+        parser.error("--steps must be at least 1")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    level_files = find_levels(args.levels)
+    for level_file in level_files:
+        problem = check_level(level_file, args.steps, rng)
+        if problem is not None:
+            print(f"MISMATCH {problem}")
+            return 1
+        print(f"{level_file}: {args.steps} moves match", flush=True)
+    print(f"Spreads match on {len(level_files)} levels")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Micro-benchmarks for the simulation primitives every solver step calls.
+
+Builds synthetic square boards of increasing size and liquid coverage and
+measures the per-call cost of MoveCommand, the spreads, TimerCommand,
+State.copy, State.__hash__ and State.__eq__ on each:
+
+    python -m benchmarks.primitives
+    python -m benchmarks.primitives --sizes 10,50,200 --coverage 0.5 --json out.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from commands import AquaSpreadCommand, LavaSpreadCommand, MoveCommand, TimerCommand
+from state import State
+
+
+def make_level(size: int, coverage: float, seed: int = 0) -> str:
+    """
+    Level text for a walled size x size board.
+
+    `coverage` of the interior is liquid, split evenly between aqua and
+    lava, with a sprinkling of blocks and timers. The player starts in the
+    middle with free cells around it.
+    """
+    rng = random.Random(seed)
+    rows = [["."] * size for _ in range(size)]
+    for i in range(size):
+        rows[0][i] = rows[size - 1][i] = rows[i][0] = rows[i][size - 1] = "#"
+
+    middle = size // 2
+    reserved = {(middle + dx, middle + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)}
+    for y in range(1, size - 1):
+        for x in range(1, size - 1):
+            if (x, y) in reserved:
+                continue
+            roll = rng.random()
+            if roll < coverage / 2:
+                rows[y][x] = "A"
+            elif roll < coverage:
+                rows[y][x] = "L"
+            elif roll < coverage + 0.02:
+                rows[y][x] = "B"
+            elif roll < coverage + 0.03:
+                rows[y][x] = str(rng.randint(2, 9))
+
+    rows[middle][middle] = "U"
+    rows[size - 2][size - 2] = "G"
+    return "\n".join(" ".join(row) for row in rows) + "\n"
+
+
+def load_board(size: int, coverage: float, seed: int = 0) -> State:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"board{size}.txt")
+        with open(path, "w") as file:
+            file.write(make_level(size, coverage, seed))
+        return State(path)
+
+
+def measure(setup, call, number: int, repeat: int) -> float:
+    """Best per-call time of `call(setup())` over `repeat` rounds of `number`"""
+    best = float("inf")
+    for _ in range(repeat):
+        items = [setup() for _ in range(number)]
+        start = time.perf_counter()
+        for item in items:
+            call(item)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def benchmark_board(state: State, number: int, repeat: int) -> dict[str, float]:
+    # Spread once so the frontiers hold only the newest cells, as they do
+    # at every step of a search after the first
+    AquaSpreadCommand(state, state.aquas, state.aqua_frontier).run()
+    LavaSpreadCommand(state, state.lavas, state.lava_frontier).run()
+    # revive the player the way PlayerObserver kills it, keeping the hash
+    state.update_player_hash()
+    state.player.status = "alive"
+    state.update_player_hash()
+
+    move = next(iter(state.get_possible_moves(state.player.position)))
+    equal = state.copy()
+
+    def shared():
+        return state.copy(shared=True)
+
+    def same():
+        return state
+
+    return {
+        "move": measure(
+            shared, lambda s: MoveCommand(s, s.player, move).run(), number, repeat
+        ),
+        "aqua_spread": measure(
+            shared,
+            lambda s: AquaSpreadCommand(s, s.aquas, s.aqua_frontier).run(),
+            number,
+            repeat,
+        ),
+        "lava_spread": measure(
+            shared,
+            lambda s: LavaSpreadCommand(s, s.lavas, s.lava_frontier).run(),
+            number,
+            repeat,
+        ),
+        "timer": measure(shared, lambda s: TimerCommand(s, s.timers).run(), number, repeat),
+        "copy": measure(same, lambda s: s.copy(), number, repeat),
+        "copy_shared": measure(same, lambda s: s.copy(shared=True), number, repeat),
+        "hash": measure(same, hash, number, repeat),
+        "eq": measure(same, lambda s: s == equal, number, repeat),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation primitives")
+    parser.add_argument(
+        "--sizes",
+        default="10,25,50,100,200",
+        help="comma-separated board side lengths",
+    )
+    parser.add_argument(
+        "--coverage",
+        default="0.1,0.3",
+        help="comma-separated fractions of the board covered by liquid",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per primitive")
+    parser.add_argument("--seed", type=int, default=0, help="board layout seed")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",")]
+    coverages = [float(coverage) for coverage in args.coverage.split(",")]
+
+    results = []
+    header = None
+    for coverage in coverages:
+        for size in sizes:
+            state = load_board(size, coverage, args.seed)
+            # fewer calls per round on big boards, where each one is slow
+            number = max(3, min(1000, 100_000 // (size * size)))
+            timings = benchmark_board(state, number, args.repeat)
+            if header is None:
+                header = list(timings)
+                print(f"{'size':>5} {'cover':>5} " + " ".join(f"{n:>12}" for n in header))
+                print("(microseconds per call)")
+            print(
+                f"{size:>5} {coverage:>5} "
+                + " ".join(f"{timings[n] * 1e6:>12.2f}" for n in header),
+                flush=True,
+            )
+            results.append({"size": size, "coverage": coverage, "seconds": timings})
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"seed": args.seed, "results": results}, file, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
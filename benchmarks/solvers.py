@@ -0,0 +1,226 @@
+"""
+Solver benchmark suite.
+
+Runs every algorithm over the bundled levels with warmup and repeated runs,
+and writes the timings to JSON. Against a stored baseline, it flags the
+jobs that got slower or whose search changed:
+
+    python -m benchmarks.solvers --save benchmarks/baseline.json
+    python -m benchmarks.solvers --compare benchmarks/baseline.json
+
+Run from the repository root so the level paths resolve.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from functools import partial
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+try:
+    import resource
+except ImportError:  # not available on Windows, peak RSS is not reported
+    resource = None
+
+from algorithms import Algorithms
+from batch import run_jobs
+from factories import create_factory
+from solve import find_levels, parse_algorithms
+from state import State
+
+
+def peak_rss() -> int | None:
+    """Peak resident set size of this process in bytes"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def benchmark_level(
+    level_file: str,
+    algorithm: Algorithms,
+    warmup: int = 1,
+    repeat: int = 5,
+) -> dict:
+    """Time `repeat` searches of one level after `warmup` untimed ones"""
+    factory = create_factory(algorithm)
+    times = []
+    try:
+        for _ in range(warmup):
+            factory.run(State(level_file))
+        for _ in range(repeat):
+            result = factory.run(State(level_file))
+            times.append(result.elapsed)
+    except (OSError, ValueError, RecursionError, MemoryError) as error:
+        return {
+            "level": level_file,
+            "algorithm": algorithm.value,
+            "error": f"{type(error).__name__}: {error}",
+        }
+
+    median = statistics.median(times)
+    return {
+        "level": level_file,
+        "algorithm": algorithm.value,
+        "path_length": len(result.path),
+        "nodes": result.nodes,
+        "visited_count": result.visited_count,
+        "times": times,
+        "median": median,
+        "min": min(times),
+        "nodes_per_sec": result.nodes / median if median > 0 else None,
+        "peak_rss": peak_rss(),
+    }
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    """
+    Describe every job that regressed against the baseline.
+
+    A job regresses when its median time grows by more than `threshold`
+    (a fraction) or when it finds a different path length or expands a
+    different number of nodes, which means the search itself changed.
+    """
+    expected = {
+        (record["level"], record["algorithm"]): record
+        for record in baseline["results"]
+    }
+    problems = []
+    for record in results:
+        job = (record["level"], record["algorithm"])
+        base = expected.get(job)
+        if base is None or "error" in base:
+            continue
+        name = f"{record['level']} {record['algorithm']}"
+        if "error" in record:
+            problems.append(f"{name}: {record['error']}")
+            continue
+        for field in ("path_length", "nodes"):
+            if record[field] != base[field]:
+                problems.append(
+                    f"{name}: {field} changed {base[field]} -> {record[field]}"
+                )
+        if record["median"] > base["median"] * (1 + threshold):
+            problems.append(
+                f"{name}: median {base['median']:.4f}s -> {record['median']:.4f}s "
+                f"(+{record['median'] / base['median'] - 1:.0%})"
+            )
+    return problems
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solvers")
+    parser.add_argument(
+        "levels",
+        nargs="*",
+        default=["levels"],
+        help="level files or directories of level files (default: levels)",
+    )
+    parser.add_argument(
+        "-a",
+        "--algorithm",
+        action="append",
+        choices=[algorithm.value for algorithm in Algorithms] + ["all"],
+        help="algorithm to benchmark, may be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=1, help="untimed runs per job, at least 0"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="timed runs per job, at least 1"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=120,
+        help="seconds before a job, warmup included, is abandoned",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="jobs run side by side; above 1 the timings disturb each other",
+    )
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="allowed median slowdown before flagging, as a fraction",
+    )
+    args = parser.parse_args(argv)
+    if args.warmup < 0:
+        parser.error("--warmup must be at least 0")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    algorithms = parse_algorithms(args.algorithm or ["all"])
+    jobs = [
+        (level_file, algorithm)
+        for level_file in find_levels(args.levels)
+        for algorithm in algorithms
+    ]
+    order = {
+        (level_file, algorithm.value): i
+        for i, (level_file, algorithm) in enumerate(jobs)
+    }
+
+    task = partial(benchmark_level, warmup=args.warmup, repeat=args.repeat)
+    results = []
+    for record in run_jobs(jobs, workers=args.jobs, timeout=args.timeout, task=task):
+        if "error" in record:
+            print(f"{record['level']} {record['algorithm']}: {record['error']}")
+        else:
+            print(
+                f"{record['level']} {record['algorithm']}: "
+                f"median {record['median']:.4f}s, "
+                f"{record['nodes_per_sec'] or 0:.0f} nodes/s, "
+                f"path {record['path_length']}",
+                flush=True,
+            )
+        results.append(record)
+    results.sort(key=lambda record: order[(record["level"], record["algorithm"])])
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "warmup": args.warmup,
+            "repeat": args.repeat,
+            "timeout": args.timeout,
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        problems = compare(results, baseline, args.threshold)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            return 1
+        print("No regressions")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+from array import array
+from collections import deque
+
+from pygame.math import Vector2
+
+from forecast import LavaForecast, liquid_key
+from items import Item, Block, Liquid, Player, Timer
+from position import Position
+from state import State
+
+# distance to a cell that walls and containers cut off
+UNREACHABLE = 1_000_000_000
+# region label of a cell no one has asked about yet
+UNLABELLED = -2
+# entries a Board cache keyed by dynamic state holds before it is emptied;
+# there is one entry per state in the worst case, so it needs a bound
+CACHE_SIZE = 1 << 14
+
+
+class Board:
+    """
+    Static part of a level shared by every SearchState packed from it.
+
+    Cells are numbered row by row (index = y * width + x) and every dynamic
+    entity set is stored as an integer bitboard over those indices.
+    """
+
+    def __init__(self, state: State, cache_size: int = CACHE_SIZE):
+        self.state = state
+        self.grid = state.grid
+        self.width = state.world_width
+        self.height = state.world_height
+        self.position = state.grid.position
+        self.goal = self.index(state.goal.position)
+        # filled in as the heuristic asks for them: BFS distances from a
+        # cell (at most one per cell), and the point tree length of a set
+        # of points (bounded by cache_size, like the caches below)
+        self.fields: dict[int, list[int]] = {}
+        self.trees: dict[int, int] = {}
+        self.adjacency: list[list[int] | None] = [None] * (self.width * self.height)
+        # stones bitboard -> region label of every cell, see region()
+        self.regions: dict[int, array] = {}
+        # liquid key of every turn of every forecast -> (forecast, turn)
+        self.forecasts: dict[tuple, tuple[LavaForecast, int]] = {}
+        # (forecast number, player cell, turn) -> LavaForecast.reach()
+        self.reached: dict[tuple[int, int, int], tuple[bool, int]] = {}
+        self.cache_size = cache_size
+
+    def index(self, position: Position) -> int:
+        return self.grid.index(position)
+
+    def pack_bits(self, positions) -> int:
+        bits = 0
+        for position in positions:
+            bits |= 1 << self.index(position)
+        return bits
+
+    def unpack_bits(self, bits: int):
+        while bits:
+            low = bits & -bits
+            yield self.position(low.bit_length() - 1)
+            bits ^= low
+
+    def unpack_indices(self, bits: int):
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def adjacent(self, index: int) -> list[int]:
+        """Indices of the cells a player can step to from `index`"""
+        cells = self.adjacency[index]
+        if cells is None:
+            cells = self.adjacency[index] = [
+                self.index(position)
+                for _, position in self.grid.neighbours(self.position(index))
+            ]
+        return cells
+
+    def remember(self, cache: dict, key, value):
+        """Store `value` in `cache`, emptying it first if it is full"""
+        if len(cache) >= self.cache_size:
+            cache.clear()
+        cache[key] = value
+        return value
+
+    def forecast(self, node: "SearchState", state: State) -> tuple[LavaForecast, int]:
+        """
+        The lava forecast `node` is on and how many turns into it, running
+        a new one from `state` (the unpacked node) when none is.
+        """
+        key = liquid_key(node)
+        entry = self.forecasts.get(key)
+        if entry is None:
+            forecast = LavaForecast(self, state)
+            entry = (forecast, 0)
+            if len(self.forecasts) + len(forecast.keys) > self.cache_size:
+                self.forecasts.clear()
+            for turn, later in enumerate(forecast.keys):
+                self.forecasts.setdefault(later, (forecast, turn))
+        return entry
+
+    def distances(self, source: int) -> list[int]:
+        """
+        Fewest moves from `source` to every cell, going around walls and
+        containers only. Blocks, liquids, stones and timers can only add
+        moves, so these never overestimate.
+        """
+        field = self.fields.get(source)
+        if field is not None:
+            return field
+        field = [UNREACHABLE] * (self.width * self.height)
+        field[source] = 0
+        queue = deque([source])
+        while queue:
+            index = queue.popleft()
+            distance = field[index] + 1
+            for neighbour in self.adjacent(index):
+                if field[neighbour] == UNREACHABLE:
+                    field[neighbour] = distance
+                    queue.append(neighbour)
+        self.fields[source] = field
+        return field
+
+    def point_tree(self, points: int) -> int:
+        """
+        Length of a minimum spanning tree over the `points` cells and the
+        goal, with BFS distances as edge weights (Prim's algorithm). Any
+        walk that collects the points and ends at the goal is at least
+        this long.
+        """
+        length = self.trees.get(points)
+        if length is not None:
+            return length
+        length = 0
+        goal_field = self.distances(self.goal)
+        best = {index: goal_field[index] for index in self.unpack_indices(points)}
+        while best:
+            index = min(best, key=best.__getitem__)
+            length += best.pop(index)
+            field = self.distances(index)
+            for other, distance in best.items():
+                if field[other] < distance:
+                    best[other] = field[other]
+        return self.remember(self.trees, points, min(length, UNREACHABLE))
+
+    def estimate(self, player: int, points: int) -> int:
+        """
+        Admissible and consistent lower bound on the moves left: the
+        distance to the nearest point plus the point tree, or just the
+        distance to the goal once every point is collected.
+        """
+        if not points:
+            return self.distances(self.goal)[player]
+        nearest = min(
+            self.distances(index)[player] for index in self.unpack_indices(points)
+        )
+        return min(nearest + self.point_tree(points), UNREACHABLE)
+
+    def region(self, stones: int, cell: int) -> int:
+        """
+        Label of the connected region `cell` belongs to with these stones in
+        place, or -1 if a player can never stand on it. Stones are permanent
+        and walls and containers static, while blocks, liquids and timers
+        can all get out of the way, so a player never leaves its region.
+        Regions are flooded the first time one of their cells is asked for.
+        """
+        labels = self.regions.get(stones)
+        if labels is None:
+            labels = self.remember(
+                self.regions,
+                stones,
+                array("i", [UNLABELLED]) * (self.width * self.height),
+            )
+        label = labels[cell]
+        if label != UNLABELLED:
+            return label
+        if not self.grid.walkable[cell] or stones >> cell & 1:
+            labels[cell] = -1
+            return -1
+
+        # the cell a region is flooded from labels it
+        label = labels[cell] = cell
+        queue = [cell]
+        while queue:
+            index = queue.pop()
+            for neighbour in self.adjacent(index):
+                if labels[neighbour] == UNLABELLED and not stones >> neighbour & 1:
+                    labels[neighbour] = label
+                    queue.append(neighbour)
+        return label
+
+    def is_dead(self, node: "SearchState") -> bool:
+        """
+        Whether `node` can never be won: the player is dead, the goal or a
+        remaining point is cut off from the player by stones, walls and
+        containers, or lava covers one with no block left to push onto it.
+        """
+        if node.status == "dead":
+            return True
+        lavas = node.lavas
+        if not node.blocks and (lavas >> self.goal & 1 or lavas & node.points):
+            return True
+        stones = node.stones
+        region = self.region(stones, node.player)
+        if region < 0 or self.region(stones, self.goal) != region:
+            return True
+        return any(
+            self.region(stones, cell) != region
+            for cell in self.unpack_indices(node.points)
+        )
+
+    def pack(self, state: State) -> "SearchState":
+        timers = tuple(
+            sorted(
+                (self.index(pos), timer.duration) for pos, timer in state.timers.items()
+            )
+        )
+        return SearchState(
+            self,
+            self.index(state.player.position),
+            state.player.status,
+            self.pack_bits(state.lavas),
+            self.pack_bits(state.aquas),
+            self.pack_bits(state.blocks),
+            self.pack_bits(state.points),
+            self.pack_bits(state.stones),
+            self.pack_bits(state.deads),
+            timers,
+            state.zobrist,
+            self.pack_bits(state.aqua_frontier),
+            self.pack_bits(state.lava_frontier),
+        )
+
+    def unpack(self, node: "SearchState") -> State:
+        template = self.state
+        state = State.__new__(State)
+
+        state.moves = template.moves
+        state.world_size = template.world_size
+        state.ground = template.ground
+        state.walls = template.walls
+        state.containers = template.containers
+        state.grid = template.grid
+        state.shared = set()
+
+        state.lavas = {
+            pos: Liquid(state, pos, Vector2(0, 0))
+            for pos in self.unpack_bits(node.lavas)
+        }
+        state.aquas = {
+            pos: Liquid(state, pos, Vector2(0, 0))
+            for pos in self.unpack_bits(node.aquas)
+        }
+        state.aqua_frontier = set(self.unpack_bits(node.aqua_frontier))
+        state.lava_frontier = set(self.unpack_bits(node.lava_frontier))
+        state.blocks = {
+            pos: Block(state, pos, Vector2(0, 0))
+            for pos in self.unpack_bits(node.blocks)
+        }
+        state.goal = Item(state, template.goal.position, template.goal.tile.copy())
+        state.player = Player(state, self.position(node.player), Vector2(0, 0))
+        state.player.status = node.status
+        state.points = {
+            pos: Item(state, pos, Vector2(0, 0))
+            for pos in self.unpack_bits(node.points)
+        }
+        state.deads = {
+            pos: Item(state, pos, Vector2(0, 0)) for pos in self.unpack_bits(node.deads)
+        }
+        state.stones = {
+            pos: Item(state, pos, Vector2(0, 0))
+            for pos in self.unpack_bits(node.stones)
+        }
+        state.timers = {}
+        for index, duration in node.timers:
+            pos = self.position(index)
+            state.timers[pos] = Timer(state, pos, Vector2(0, 0), duration)
+
+        state.observers = state.create_observers()
+        state.zobrist = node.zobrist
+
+        return state
+
+
+class SearchState:
+    """
+    Immutable, bit-packed snapshot of the dynamic part of a State.
+
+    Solvers keep these in their frontier, visited and parent tables instead
+    of full State objects, and unpack one only when it is expanded. The
+    liquid frontiers ride along so spreading resumes where it left off, but
+    are not part of the state's identity.
+    """
+
+    __slots__ = (
+        "board",
+        "player",
+        "status",
+        "lavas",
+        "aquas",
+        "blocks",
+        "points",
+        "stones",
+        "deads",
+        "timers",
+        "zobrist",
+        "aqua_frontier",
+        "lava_frontier",
+    )
+
+    def __init__(
+        self,
+        board: Board,
+        player: int,
+        status: str,
+        lavas: int,
+        aquas: int,
+        blocks: int,
+        points: int,
+        stones: int,
+        deads: int,
+        timers: tuple[tuple[int, int], ...],
+        zobrist: int,
+        aqua_frontier: int = 0,
+        lava_frontier: int = 0,
+    ):
+        self.board = board
+        self.player = player
+        self.status = status
+        self.lavas = lavas
+        self.aquas = aquas
+        self.blocks = blocks
+        self.points = points
+        self.stones = stones
+        self.deads = deads
+        self.timers = timers
+        self.zobrist = zobrist
+        self.aqua_frontier = aqua_frontier
+        self.lava_frontier = lava_frontier
+
+    def key(self):
+        return (
+            self.player,
+            self.status,
+            self.lavas,
+            self.aquas,
+            self.blocks,
+            self.points,
+            self.stones,
+            self.deads,
+            self.timers,
+        )
+
+    def to_state(self) -> State:
+        return self.board.unpack(self)
+
+    @property
+    def player_position(self) -> Position:
+        return self.board.position(self.player)
+
+    @property
+    def goal_position(self) -> Position:
+        return self.board.position(self.board.goal)
+
+    def lava_count(self) -> int:
+        return self.lavas.bit_count()
+
+    def goal_distance(self) -> int:
+        player = self.player_position
+        goal = self.goal_position
+        return abs(player.x - goal.x) + abs(player.y - goal.y)
+
+    def heuristic(self) -> int:
+        return self.board.estimate(self.player, self.points)
+
+    def is_won(self) -> bool:
+        return self.points == 0 and self.player == self.board.goal
+
+    def __hash__(self) -> int:
+        return self.zobrist
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SearchState):
+            return False
+        return self.zobrist == other.zobrist and self.key() == other.key()
+
+    # Ordering mirrors State so heap tie-breaking is unchanged
+    def __lt__(self, other) -> bool:
+        return self.lava_count() < other.lava_count()
+
+    def __gt__(self, other) -> bool:
+        return self.lava_count() > other.lava_count()
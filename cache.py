@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+from collections import deque
+
+from position import MOVE_NAMES, MOVES_BY_NAME, Position
+from state import State
+
+
+# Bump whenever a change to the rules or the solvers can change the path
+# an algorithm returns, so solutions cached by older code are ignored
+ENGINE_VERSION = 4
+
+
+def default_directory() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "lava-and-aqua", "solutions")
+
+
+def describe(state: State) -> str:
+    """Canonical text of everything in a state that a search depends on"""
+
+    def cells(collection):
+        return sorted((int(pos.x), int(pos.y)) for pos in collection)
+
+    player = state.player.position
+    goal = state.goal.position
+    return json.dumps(
+        {
+            "size": [state.world_width, state.world_height],
+            "walls": cells(state.walls),
+            "containers": cells(state.containers),
+            "goal": [int(goal.x), int(goal.y)],
+            "player": [int(player.x), int(player.y), state.player.status],
+            "lavas": cells(state.lavas),
+            "aquas": cells(state.aquas),
+            "blocks": cells(state.blocks),
+            "points": cells(state.points),
+            "stones": cells(state.stones),
+            "deads": cells(state.deads),
+            "timers": sorted(
+                (int(pos.x), int(pos.y), timer.duration)
+                for pos, timer in state.timers.items()
+            ),
+        },
+        separators=(",", ":"),
+    )
+
+
+class SolutionCache:
+    """
+    Solved paths stored on disk, one JSON file per (level, algorithm).
+
+    The key hashes the level's content rather than its file name, so an
+    edited level misses the cache instead of replaying a stale path, and
+    ENGINE_VERSION is part of the key so that engine changes do too.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or default_directory()
+
+    def key(self, state: State, algorithm: str) -> str:
+        content = f"{ENGINE_VERSION}\n{algorithm}\n{describe(state)}"
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key: str) -> deque[Position] | None:
+        try:
+            with open(self.path_for(key)) as file:
+                entry = json.load(file)
+            if not entry["path"]:
+                # written before only solutions were kept: the search may
+                # just have been cut short
+                return None
+            return deque(MOVES_BY_NAME[name] for name in entry["path"])
+        except (OSError, ValueError, KeyError, TypeError):
+            # missing, unreadable or corrupt entries are plain misses
+            return None
+
+    def put(self, key: str, path: deque[Position], **info):
+        target = self.path_for(key)
+        entry = {
+            "engine": ENGINE_VERSION,
+            "path": "".join(MOVE_NAMES[move] for move in path),
+            **info,
+        }
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # write then rename, so readers never see a half-written entry
+            temporary = f"{target}.{os.getpid()}.tmp"
+            with open(temporary, "w") as file:
+                json.dump(entry, file)
+            os.replace(temporary, target)
+        except OSError:
+            # caching is best effort; the search result is still returned
+            pass
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                if filename.endswith(".json"):
+                    os.remove(os.path.join(root, filename))
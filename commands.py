@@ -3,6 +3,7 @@ from abc import ABC, abstractmethod
 from items import Block, Liquid, Player, Timer
 from position import Position
 from state import State
+import zobrist
 
 
 class Command(ABC):
@@ -39,7 +40,9 @@ class MoveCommand(Command):
             else:
                 return
 
+        self.state.update_player_hash()
         self.player.position = new_pos
+        self.state.update_player_hash()
 
         if self.state.is_goal(self.player.position):
             self.state.notify_player_reached_goal(self.player)
@@ -47,8 +50,16 @@ class MoveCommand(Command):
         # notify observers that the player moved
         self.state.notify_player_moved(self.player, self.move)
 
-        AquaSpreadCommand(self.state, self.state.aquas).run()
-        LavaSpreadCommand(self.state, self.state.lavas).run()
+        AquaSpreadCommand(
+            self.state,
+            self.state.aquas,
+            self.state.aqua_frontier,
+        ).run()
+        LavaSpreadCommand(
+            self.state,
+            self.state.lavas,
+            self.state.lava_frontier,
+        ).run()
         TimerCommand(self.state, self.state.timers).run()
 
 
@@ -64,36 +75,66 @@ class BlockMoveCommand(Command):
             self.block.position.to_vector()
             + self.move.to_vector() * self.block.speed
         )
-        self.state.blocks.pop(self.block.position)
+        blocks = self.state.writable("blocks")
+        blocks.pop(self.block.position)
+        self.state.update_hash(zobrist.BLOCK, self.block.position)
+        self.state.activate_neighbours(self.block.position)
         new_block = Block(self.state, new_pos, self.block.tile)
-        self.state.blocks[new_pos] = new_block
+        blocks[new_pos] = new_block
+        self.state.update_hash(zobrist.BLOCK, new_pos)
         self.state.notify_block_moved(new_block)
 
 
 class SpreadCommand(Command):
-    moves = [Position(0, 1), Position(1, 0), Position(0, -1), Position(-1, 0)]
-
-    def __init__(self, state: State, liquids: dict[Position, Liquid]):
+    kind = None
+    # State attributes the liquids and their frontier live in
+    liquids_name = None
+    frontier_name = None
+
+    def __init__(
+        self,
+        state: State,
+        liquids: dict[Position, Liquid],
+        frontier: set[Position],
+    ):
         self.state = state
         self.liquids = liquids
+        self.frontier = frontier
+
+    def neighbours(self, position: Position):
+        # liquids pass over containers; walls and bounds are filtered by the grid
+        return self.state.grid.neighbours(position, check_containers=False)
 
     def can_move(self, position: Position):
-        return self.state.can_move(position, check_containers=False)
+        return self.state.is_unblocked(position)
 
     def add(self, position: Position, liquid: Liquid):
         new_liquid = Liquid(self.state, position, liquid.tile)
+        self.liquids = self.state.writable(self.liquids_name)
         self.liquids[position] = new_liquid
+        self.frontier = self.state.writable(self.frontier_name)
+        self.frontier.add(position)
+        self.state.update_hash(self.kind, position)
+
+    def take_frontier(self) -> list[Liquid]:
+        # A spread fills every free neighbour, so cells processed this turn
+        # become interior; only the cells added now (or re-activated by a
+        # block or timer freeing a neighbour) can spread next turn.
+        current = [self.liquids[pos] for pos in self.frontier if pos in self.liquids]
+        if self.frontier:
+            self.frontier = self.state.writable(self.frontier_name, clear=True)
+        return current
 
 
 class AquaSpreadCommand(SpreadCommand):
+    kind = zobrist.AQUA
+    liquids_name = "aquas"
+    frontier_name = "aqua_frontier"
+
     def run(self):
-        current_aquas = list(self.liquids.values())
+        current_aquas = self.take_frontier()
         for aqua in current_aquas:
-            for move in self.moves:
-                new_pos = Position.from_vector(
-                    aqua.position.to_vector() + move.to_vector() * aqua.speed
-                )
-
+            for _, new_pos in self.neighbours(aqua.position):
                 if not self.can_move(new_pos):
                     continue
 
@@ -108,14 +149,14 @@ class AquaSpreadCommand(SpreadCommand):
 
 
 class LavaSpreadCommand(SpreadCommand):
+    kind = zobrist.LAVA
+    liquids_name = "lavas"
+    frontier_name = "lava_frontier"
+
     def run(self):
-        current_lavas = list(self.liquids.values())
+        current_lavas = self.take_frontier()
         for lava in current_lavas:
-            for move in self.moves:
-                new_pos = Position.from_vector(
-                    lava.position.to_vector() + move.to_vector() * lava.speed
-                )
-
+            for _, new_pos in self.neighbours(lava.position):
                 if not self.can_move(new_pos):
                     continue
 
@@ -138,16 +179,25 @@ class TimerCommand(Command):
         self.timers = timers
 
     def decrement(self, value: int):
-        for timer in self.timers.values():
+        for pos, timer in self.timers.items():
+            self.state.update_hash(zobrist.TIMER, pos, timer.duration)
             timer.duration -= value
+            self.state.update_hash(zobrist.TIMER, pos, timer.duration)
 
     def filter(self):
-        new_timers = {
-            pos: timer for pos, timer in self.timers.items() if timer.duration > 0
-        }
+        new_timers = {}
+        for pos, timer in self.timers.items():
+            if timer.duration > 0:
+                new_timers[pos] = timer
+            else:
+                self.state.update_hash(zobrist.TIMER, pos, timer.duration)
+                self.state.activate_neighbours(pos)
         self.timers.clear()
         self.timers.update(new_timers)
 
     def run(self):
+        if not self.timers:
+            return
+        self.timers = self.state.writable("timers")
         self.decrement(1)
         self.filter()
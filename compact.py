@@ -0,0 +1,359 @@
+"""
+Memory-compact search structures.
+
+Used by the compact solver modes for levels whose state space does not
+fit in memory as dicts of SearchStates: a closed set that stores only
+64-bit fingerprints, with each state's parent link as a fingerprint and
+a move byte, and frontier queues that keep up to a byte budget of
+states in memory and spill the rest to temporary files.
+"""
+
+import heapq
+import mmap
+import pickle
+import struct
+import sys
+import tempfile
+from array import array
+from collections import deque
+
+from bitboard import Board, SearchState
+from position import MOVE_NAMES, Position
+from state import State
+
+# move byte of each move, and the byte of a root, which has none
+MOVES: list[Position] = list(MOVE_NAMES)
+MOVE_BYTES: dict[Position, int] = {move: i for i, move in enumerate(MOVES)}
+NO_MOVE = 255
+
+# length prefix of every record in a spill file
+RECORD = struct.Struct("<I")
+# most bytes written to one spill file before the next is started
+SEGMENT_BYTES = 1 << 22
+
+# the Board caches bounded by cache_size (point trees, regions, forecasts
+# and reach), and roughly the most bytes per board cell one entry takes
+BOARD_CACHES = 4
+CACHE_BYTES_PER_CELL = 8
+# the Board caches get this fraction of the frontier budget, on top of it
+CACHE_SHARE = 8
+
+
+def fingerprint(node: SearchState) -> int:
+    """
+    The node's 64-bit Zobrist hash, with 0 (an empty slot) moved to 1.
+
+    Two states with the same fingerprint are treated as one, so a
+    collision can hide a state from the search; with 64 bits that takes
+    billions of states to become likely.
+    """
+    return node.zobrist or 1
+
+
+def board_cache_size(state: State, budget: int) -> int:
+    """
+    Entries per Board cache that keep them all within a share of the
+    frontier `budget`, so that their memory follows the budget rather than
+    the number of states searched.
+    """
+    cells = state.world_width * state.world_height
+    entry = BOARD_CACHES * CACHE_BYTES_PER_CELL * cells
+    return max(64, budget // CACHE_SHARE // entry)
+
+
+def node_fields(node: SearchState) -> tuple:
+    """A SearchState as plain values, to pickle without its Board"""
+    return node.key(), node.zobrist, node.aqua_frontier, node.lava_frontier
+
+
+def node_from_fields(board: Board, fields: tuple) -> SearchState:
+    key, zobrist, aqua_frontier, lava_frontier = fields
+    return SearchState(board, *key, zobrist, aqua_frontier, lava_frontier)
+
+
+class FingerprintTable:
+    """
+    Open-addressing hash table from state fingerprints to the fingerprint
+    of the state they were reached from and the move byte that did it.
+    About 17 bytes per slot, kept at most half full.
+    """
+
+    def __init__(self, capacity: int = 1 << 16):
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self.keys = array("Q", bytes(8 * capacity))
+        self.parents = array("Q", bytes(8 * capacity))
+        self.moves = bytearray(capacity)
+        self.mask = capacity - 1
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def slot(self, key: int) -> int:
+        keys = self.keys
+        mask = self.mask
+        # Zobrist keys are already well mixed, the low bits will do
+        index = key & mask
+        while keys[index] and keys[index] != key:
+            index = (index + 1) & mask
+        return index
+
+    def __contains__(self, key: int) -> bool:
+        return self.keys[self.slot(key)] == key
+
+    def add(self, key: int, parent: int, move: int) -> bool:
+        """Store `key` unless already there; returns whether it was new"""
+        index = self.slot(key)
+        if self.keys[index]:
+            return False
+        self.keys[index] = key
+        self.parents[index] = parent
+        self.moves[index] = move
+        self.size += 1
+        if 2 * self.size > len(self.keys):
+            self.grow()
+        return True
+
+    def get(self, key: int) -> tuple[int, int] | None:
+        index = self.slot(key)
+        if self.keys[index] != key:
+            return None
+        return self.parents[index], self.moves[index]
+
+    def grow(self):
+        keys, parents, moves = self.keys, self.parents, self.moves
+        capacity = 2 * len(keys)
+        self.keys = array("Q", bytes(8 * capacity))
+        self.parents = array("Q", bytes(8 * capacity))
+        self.moves = bytearray(capacity)
+        self.mask = capacity - 1
+        for i, key in enumerate(keys):
+            if key:
+                index = self.slot(key)
+                self.keys[index] = key
+                self.parents[index] = parents[i]
+                self.moves[index] = moves[i]
+
+    def path_to(self, key: int) -> deque[Position]:
+        """The moves from the root to `key`, following parent links"""
+        path: deque[Position] = deque()
+        while True:
+            parent, move = self.get(key)
+            if move == NO_MOVE:
+                return path
+            path.appendleft(MOVES[move])
+            key = parent
+
+
+class MemoryBudget:
+    """
+    Bytes of frontier states allowed in memory, shared by every queue of
+    one search. The size of an entry is measured on the first one and
+    assumed for the rest; every entry of a level has the same fields over
+    the same board, so they differ little.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self.entry_size: int | None = None
+
+    def measure(self, entry: tuple) -> int:
+        if self.entry_size is None:
+            node = entry[0]
+            self.entry_size = sys.getsizeof(entry) + sum(
+                sys.getsizeof(value)
+                for value in (
+                    node,
+                    *node.key(),
+                    node.aqua_frontier,
+                    node.lava_frontier,
+                )
+            )
+        return self.entry_size
+
+    def fits(self, entry: tuple) -> bool:
+        return self.used + self.measure(entry) <= self.limit
+
+    def has_room(self) -> bool:
+        return self.used + (self.entry_size or 0) <= self.limit
+
+
+class SpillSegment:
+    """
+    One spill file: records are appended at its end and read back from
+    `read_offset`, `count` of them still unread.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.file = tempfile.TemporaryFile(dir=directory)
+        self.size = 0
+        self.count = 0
+        self.read_offset = 0
+
+    def write(self, data: bytes):
+        self.file.write(RECORD.pack(len(data)))
+        self.file.write(data)
+        self.size += RECORD.size + len(data)
+        self.count += 1
+
+    def view(self) -> tuple[mmap.mmap, int]:
+        """
+        A read-only map of the unread part of the file, from the mmap
+        boundary at or before `read_offset`, and where in it that offset is.
+        """
+        self.file.flush()
+        start = self.read_offset - self.read_offset % mmap.ALLOCATIONGRANULARITY
+        view = mmap.mmap(
+            self.file.fileno(),
+            self.size - start,
+            offset=start,
+            access=mmap.ACCESS_READ,
+        )
+        return view, self.read_offset - start
+
+    def close(self):
+        self.file.close()
+
+
+def segment_size(budget: MemoryBudget) -> int:
+    """
+    Bytes written to one spill file before the next is started: about the
+    budget, so that mapping one stays within it, up to SEGMENT_BYTES.
+    """
+    return min(SEGMENT_BYTES, max(budget.limit, mmap.ALLOCATIONGRANULARITY))
+
+
+class SpillQueue:
+    """
+    FIFO queue of (SearchState, *extra) entries.
+
+    Entries stay in memory while the budget allows. Past it, and for as
+    long as anything is on disk, they are pickled to temporary segment
+    files of about `segment_size(budget)` bytes each, which are read back
+    through mmap in budget-sized batches once the in-memory part runs
+    out, and deleted once read. The files on disk so hold about the
+    spilled entries plus one segment, however many states pass through.
+    """
+
+    def __init__(
+        self, board: Board, budget: MemoryBudget, directory: str | None = None
+    ):
+        self.board = board
+        self.budget = budget
+        self.directory = directory
+        self.memory: deque[tuple] = deque()
+        # spill files, oldest first: read from the first, written to the last
+        self.segments: deque[SpillSegment] = deque()
+        self.segment_size = segment_size(budget)
+        # entries on disk
+        self.spilled = 0
+
+    def __len__(self) -> int:
+        return len(self.memory) + self.spilled
+
+    @property
+    def disk_size(self) -> int:
+        """Bytes in the spill files currently on disk"""
+        return sum(segment.size for segment in self.segments)
+
+    def append(self, entry: tuple):
+        if not self.spilled and self.budget.fits(entry):
+            self.memory.append(entry)
+            self.budget.used += self.budget.measure(entry)
+            return
+        if not self.segments or self.segments[-1].size >= self.segment_size:
+            self.segments.append(SpillSegment(self.directory))
+        node, *extra = entry
+        data = pickle.dumps((node_fields(node), extra), pickle.HIGHEST_PROTOCOL)
+        self.segments[-1].write(data)
+        self.spilled += 1
+
+    def popleft(self) -> tuple:
+        if not self.memory:
+            self.refill()
+        entry = self.memory.popleft()
+        self.budget.used -= self.budget.measure(entry)
+        return entry
+
+    def refill(self):
+        if not self.spilled:
+            raise IndexError("pop from an empty SpillQueue")
+        # always load one, so a full budget cannot stall the search
+        while self.spilled and (not self.memory or self.budget.has_room()):
+            segment = self.segments[0]
+            view, offset = segment.view()
+            with view:
+                while segment.count and (
+                    not self.memory or self.budget.has_room()
+                ):
+                    (length,) = RECORD.unpack_from(view, offset)
+                    offset += RECORD.size
+                    entry = self.decode(view[offset : offset + length])
+                    offset += length
+                    self.memory.append(entry)
+                    self.budget.used += self.budget.measure(entry)
+                    segment.count -= 1
+                    segment.read_offset += RECORD.size + length
+                    self.spilled -= 1
+            if not segment.count:
+                # all read back: the file is deleted as it closes
+                segment.close()
+                self.segments.popleft()
+
+    def decode(self, data: bytes) -> tuple:
+        fields, extra = pickle.loads(data)
+        return (node_from_fields(self.board, fields), *extra)
+
+    def close(self):
+        while self.segments:
+            self.segments.popleft().close()
+
+
+class BucketQueue:
+    """
+    Priority queue of spillable FIFO buckets, one per priority (anything
+    orderable and hashable), popping the lowest priority first and in
+    insertion order within it.
+    """
+
+    def __init__(
+        self, board: Board, budget: MemoryBudget, directory: str | None = None
+    ):
+        self.board = board
+        self.budget = budget
+        self.directory = directory
+        self.buckets: dict = {}
+        # priorities whose bucket is not empty
+        self.priorities: list = []
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(self, priority, entry: tuple):
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            bucket = self.buckets[priority] = SpillQueue(
+                self.board, self.budget, self.directory
+            )
+        if not bucket:
+            heapq.heappush(self.priorities, priority)
+        bucket.append(entry)
+        self.size += 1
+
+    def pop(self) -> tuple:
+        priority = self.priorities[0]
+        bucket = self.buckets[priority]
+        entry = bucket.popleft()
+        self.size -= 1
+        if not bucket:
+            heapq.heappop(self.priorities)
+            bucket.close()
+            del self.buckets[priority]
+        return priority, entry
+
+    def close(self):
+        for bucket in self.buckets.values():
+            bucket.close()
+        self.buckets.clear()
@@ -0,0 +1,238 @@
+"""
+Compiled binary levels.
+
+A `.lvb` file holds a level's grid bytes (one tile character per cell, row
+by row, with timers marked `T`) followed by a table of cell indices for
+every entity kind and the timer durations, so that State can build its
+collections without tokenizing text:
+
+    python compiled_levels.py levels          # compile every .txt level
+    python compiled_levels.py big.txt -o big.lvb
+
+State loads `levels/levelN.lvb` instead of `levels/levelN.txt` whenever
+the compiled file was produced from the text file as it is now; otherwise
+it falls back to parsing the text.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b"LAQB"
+VERSION = 1
+EXTENSION = ".lvb"
+
+# magic, version, width, height, source size, source mtime (ns)
+HEADER = struct.Struct("<4sHxxIIqq")
+
+# tile character of each entity kind
+KINDS = {
+    "walls": "#",
+    "containers": "I",
+    "lavas": "L",
+    "aquas": "A",
+    "blocks": "B",
+    "points": "*",
+    "goal": "G",
+    "player": "U",
+}
+TIMERS = "timers"
+# grid byte of a timer cell; timers are numbers of any length in the text
+TIMER_CHAR = "T"
+
+# files this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1 << 20
+
+
+class CompiledLevel:
+    """Grid bytes and per-kind cell index tables of one level"""
+
+    def __init__(self, width: int, height: int, grid, tables, durations):
+        self.width = width
+        self.height = height
+        self.grid = grid
+        # kind -> array of cell indices (index = y * width + x)
+        self.tables: dict[str, array] = tables
+        # timer durations, in the order of tables["timers"]
+        self.durations: array = durations
+
+
+def compiled_path(level_file: str) -> str:
+    return os.path.splitext(level_file)[0] + EXTENSION
+
+
+def read_grid(level_file: str) -> tuple[int, int, bytes, array, array]:
+    """Grid bytes, timer cells and timer durations of a text level"""
+    tiles = []
+    timers = array("I")
+    durations = array("I")
+    width = 0
+    height = 0
+    with open(level_file, "r") as file:
+        for line in file:
+            row = line.rstrip("\n").split()
+            if height and len(row) != width:
+                raise ValueError(f"{level_file}: rows have different lengths")
+            width = len(row)
+            for char in row:
+                if char.isdigit():
+                    timers.append(len(tiles))
+                    durations.append(int(char))
+                    char = TIMER_CHAR
+                elif len(char) != 1:
+                    raise ValueError(f"{level_file}: unknown tile {char!r}")
+                tiles.append(char)
+            height += 1
+    return width, height, "".join(tiles).encode("ascii"), timers, durations
+
+
+def compile_level(level_file: str, output: str | None = None) -> str:
+    """Compile a text level; returns the path of the compiled file"""
+    output = output or compiled_path(level_file)
+    width, height, grid, timers, durations = read_grid(level_file)
+    stat = os.stat(level_file)
+
+    sections = [grid]
+    for kind, char in KINDS.items():
+        sections.append(index_table(grid, char.encode("ascii")))
+    sections.append(table_bytes(timers))
+    sections.append(table_bytes(durations))
+
+    with open(output, "wb") as file:
+        file.write(
+            HEADER.pack(MAGIC, VERSION, width, height, stat.st_size, stat.st_mtime_ns)
+        )
+        for section in sections:
+            file.write(section)
+    return output
+
+
+def index_table(grid: bytes, char: bytes) -> bytes:
+    indices = array("I")
+    start = grid.find(char)
+    while start >= 0:
+        indices.append(start)
+        start = grid.find(char, start + 1)
+    return table_bytes(indices)
+
+
+def table_bytes(indices: array) -> bytes:
+    if sys.byteorder != "little":
+        indices = array("I", indices)
+        indices.byteswap()
+    return struct.pack("<I", len(indices)) + indices.tobytes()
+
+
+def is_fresh(level_file: str, source_size: int, source_mtime: int) -> bool:
+    try:
+        stat = os.stat(level_file)
+    except OSError:
+        # the compiled file is all there is
+        return True
+    return stat.st_size == source_size and stat.st_mtime_ns == source_mtime
+
+
+def load_compiled(level_file: str) -> CompiledLevel | None:
+    """
+    The compiled form of `level_file`, or None when there is none or it is
+    stale or unreadable. A `.lvb` path is loaded as it is.
+    """
+    if level_file.endswith(EXTENSION):
+        path = level_file
+        source = None
+    else:
+        path = compiled_path(level_file)
+        source = level_file
+
+    try:
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < MMAP_THRESHOLD:
+                return parse_buffer(file.read(), path, source)
+            # the map is closed here; parse_buffer copies out what it keeps
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return parse_buffer(buffer, path, source)
+    except OSError:
+        if source is None:
+            raise
+        return None
+
+
+def parse_buffer(buffer, path: str, source: str | None) -> CompiledLevel | None:
+    try:
+        with memoryview(buffer) as view:
+            return parse_compiled(view, source)
+    except (ValueError, struct.error):
+        if source is None:
+            raise ValueError(f"{path}: not a valid compiled level")
+        return None
+
+
+def parse_compiled(view: memoryview, source: str | None) -> CompiledLevel | None:
+    magic, version, width, height, source_size, source_mtime = HEADER.unpack_from(
+        view
+    )
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("unknown compiled level format")
+    if source is not None and not is_fresh(source, source_size, source_mtime):
+        return None
+
+    offset = HEADER.size
+    cells = width * height
+    grid = bytes(view[offset : offset + cells])
+    offset += cells
+
+    if len(grid) != cells:
+        raise ValueError("truncated compiled level")
+
+    tables = {}
+    for kind in (*KINDS, TIMERS):
+        tables[kind], offset = read_table(view, offset)
+    durations, offset = read_table(view, offset)
+    if len(durations) != len(tables[TIMERS]):
+        raise ValueError("timer tables do not match")
+
+    return CompiledLevel(width, height, grid, tables, durations)
+
+
+def read_table(view: memoryview, offset: int) -> tuple[array, int]:
+    (count,) = struct.unpack_from("<I", view, offset)
+    offset += 4
+    if offset + 4 * count > len(view):
+        raise ValueError("truncated compiled level")
+    table = array("I")
+    table.frombytes(view[offset : offset + 4 * count])
+    if sys.byteorder != "little":
+        table.byteswap()
+    return table, offset + 4 * count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compile text levels to .lvb")
+    parser.add_argument("levels", nargs="+", help="level files or directories")
+    parser.add_argument("-o", "--output", help="output file (one input only)")
+    args = parser.parse_args(argv)
+
+    level_files = []
+    for path in args.levels:
+        if os.path.isdir(path):
+            level_files.extend(
+                os.path.join(path, filename)
+                for filename in sorted(os.listdir(path))
+                if filename.endswith(".txt")
+            )
+        else:
+            level_files.append(path)
+    if args.output and len(level_files) != 1:
+        parser.error("--output needs exactly one level")
+
+    for level_file in level_files:
+        print(compile_level(level_file, args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
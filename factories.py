@@ -1,52 +1,261 @@
 from abc import ABC, abstractmethod
 from collections import deque
 import time
+import tracemalloc
 
-from algorithms import Algorithm, DFS, BFS, UCS, HillClimb, AStar
+from algorithms import (
+    Algorithm,
+    Algorithms,
+    DFS,
+    BFS,
+    UCS,
+    HillClimb,
+    AStar,
+    IDAStar,
+    CompactBFS,
+    CompactAStar,
+)
+from cache import SolutionCache
+from parallel import ParallelBFS
+from portfolio import Portfolio
+from instrumentation import Instrumentation
 from state import State
-from position import Position
+from position import MOVE_NAMES, Position
+
+
+class SolveResult:
+    """Outcome of one search, as reported by AlgorithmFactory.run"""
+
+    def __init__(
+        self,
+        path: deque[Position],
+        nodes: int,
+        visited_count: int,
+        elapsed: float,
+        peak_memory: int | None = None,
+    ):
+        self.path = path
+        self.nodes = nodes
+        self.visited_count = visited_count
+        self.elapsed = elapsed
+        # bytes allocated at the search's peak, None when not traced
+        self.peak_memory = peak_memory
+
+    @property
+    def solved(self) -> bool:
+        return len(self.path) > 0
+
+    def moves(self) -> str:
+        return "".join(MOVE_NAMES[move] for move in self.path)
+
+    def to_dict(self) -> dict:
+        return {
+            "solved": self.solved,
+            "path": self.moves(),
+            "path_length": len(self.path),
+            "nodes": self.nodes,
+            "visited_count": self.visited_count,
+            "elapsed": self.elapsed,
+            "peak_memory": self.peak_memory,
+        }
 
 
 class AlgorithmFactory(ABC):
+    algorithm: Algorithms
+
+    def __init__(
+        self, cache: SolutionCache | None = None, depth_limit: int | None = None
+    ):
+        # consulted by solve() before searching
+        self.cache = cache
+        # passed on by the depth-first searches, ignored by the rest
+        self.depth_limit = depth_limit
+
+    def cache_name(self) -> str:
+        # a limited search can return no path where an unlimited one did
+        if self.depth_limit is None:
+            return self.algorithm.value
+        return f"{self.algorithm.value}-depth{self.depth_limit}"
+
     @abstractmethod
     def create(self) -> Algorithm:
         pass
 
-    def solve(self, state: State) -> deque[Position] | None:
-        algorithm = self.create()
-        start_time = time.time()
-        algorithm(state)
-        end_time = time.time()
-        visited_count = algorithm.get_visited_count()
-        nodes = algorithm.get_nodes()
-        path = algorithm.get_path()
-        print(f"Time taken: {end_time - start_time} seconds")
-        print(f"Visited count: {visited_count}")
-        print(f"Nodes: {nodes}")
-        print(f"Path length: {len(path)}")
-        return path
+    def run(
+        self,
+        state: State,
+        algorithm: Algorithm | None = None,
+        track_memory: bool = False,
+        instrumentation: Instrumentation | None = None,
+    ) -> SolveResult:
+        if algorithm is None:
+            algorithm = self.create()
+        if instrumentation is not None:
+            algorithm.instrumentation = instrumentation
+        instrumentation = algorithm.instrumentation
+        if track_memory:
+            tracemalloc.start()
+        try:
+            if instrumentation is not None:
+                instrumentation.begin()
+            start_time = time.perf_counter()
+            algorithm(state)
+            end_time = time.perf_counter()
+            peak_memory = None
+            if track_memory:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            if instrumentation is not None:
+                instrumentation.end()
+            if track_memory:
+                tracemalloc.stop()
+        return SolveResult(
+            algorithm.get_path(),
+            algorithm.get_nodes(),
+            algorithm.get_visited_count(),
+            end_time - start_time,
+            peak_memory,
+        )
+
+    def solve(
+        self,
+        state: State,
+        algorithm: Algorithm | None = None,
+    ) -> deque[Position] | None:
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(state, self.cache_name())
+            path = self.cache.get(key)
+            if path is not None:
+                print(f"Cached solution, path length: {len(path)}")
+                return path
+
+        if algorithm is None:
+            algorithm = self.create()
+        result = self.run(state, algorithm)
+        print(f"Time taken: {result.elapsed} seconds")
+        print(f"Visited count: {result.visited_count}")
+        print(f"Nodes: {result.nodes}")
+        print(f"Path length: {len(result.path)}")
+
+        # an empty path may only mean the search was cut short, by the
+        # depth limit or by a portfolio member, so only solutions are kept
+        if self.cache is not None and not algorithm.cancelled and result.solved:
+            self.cache.put(
+                key,
+                result.path,
+                algorithm=self.cache_name(),
+                nodes=result.nodes,
+                visited_count=result.visited_count,
+                elapsed=result.elapsed,
+            )
+        return result.path
 
 
 class DFSFactory(AlgorithmFactory):
+    algorithm = Algorithms.DFS
+
     def create(self) -> Algorithm:
-        return DFS()
+        return DFS(self.depth_limit)
 
 
 class BFSFactory(AlgorithmFactory):
+    algorithm = Algorithms.BFS
+
     def create(self) -> Algorithm:
         return BFS()
 
 
 class UCSFactory(AlgorithmFactory):
+    algorithm = Algorithms.UCS
+
     def create(self) -> Algorithm:
         return UCS()
 
 
 class HillClimbFactory(AlgorithmFactory):
+    algorithm = Algorithms.HILL_CLIMB
+
     def create(self) -> Algorithm:
-        return HillClimb()
+        return HillClimb(self.depth_limit)
 
 
 class AStarFactory(AlgorithmFactory):
+    algorithm = Algorithms.A_STAR
+
     def create(self) -> Algorithm:
         return AStar()
+
+
+class IDAStarFactory(AlgorithmFactory):
+    algorithm = Algorithms.IDA_STAR
+
+    def create(self) -> Algorithm:
+        return IDAStar()
+
+
+class CompactBFSFactory(AlgorithmFactory):
+    algorithm = Algorithms.BFS_COMPACT
+
+    def create(self) -> Algorithm:
+        return CompactBFS()
+
+
+class CompactAStarFactory(AlgorithmFactory):
+    algorithm = Algorithms.A_STAR_COMPACT
+
+    def create(self) -> Algorithm:
+        return CompactAStar()
+
+
+class ParallelBFSFactory(AlgorithmFactory):
+    algorithm = Algorithms.BFS_PARALLEL
+
+    def create(self) -> Algorithm:
+        return ParallelBFS()
+
+
+class PortfolioFactory(AlgorithmFactory):
+    algorithm = Algorithms.PORTFOLIO
+
+    def create(self) -> Algorithm:
+        return Portfolio(create_algorithm)
+
+
+class OptimalPortfolioFactory(AlgorithmFactory):
+    algorithm = Algorithms.PORTFOLIO_OPTIMAL
+
+    def create(self) -> Algorithm:
+        return Portfolio(create_algorithm, optimal=True)
+
+
+FACTORIES: dict[Algorithms, type[AlgorithmFactory]] = {
+    factory.algorithm: factory
+    for factory in (
+        DFSFactory,
+        BFSFactory,
+        UCSFactory,
+        HillClimbFactory,
+        AStarFactory,
+        IDAStarFactory,
+        CompactBFSFactory,
+        CompactAStarFactory,
+        ParallelBFSFactory,
+        PortfolioFactory,
+        OptimalPortfolioFactory,
+    )
+}
+
+
+def create_factory(
+    algorithm: Algorithms | None,
+    cache: SolutionCache | None = None,
+    depth_limit: int | None = None,
+) -> AlgorithmFactory | None:
+    factory = FACTORIES.get(algorithm)
+    return factory(cache, depth_limit) if factory is not None else None
+
+
+def create_algorithm(algorithm: Algorithms) -> Algorithm:
+    # module-level, so Portfolio can hand it to its member processes
+    return FACTORIES[algorithm]().create()
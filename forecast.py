@@ -0,0 +1,107 @@
+from itertools import count
+
+from commands import AquaSpreadCommand, LavaSpreadCommand, TimerCommand
+from state import State
+
+# turn of a cell that lava never reaches
+NEVER = 1_000_000_000
+# tells forecasts apart in Board.reached, which outlives them
+NUMBERS = count()
+
+
+class LavaForecast:
+    """
+    When lava (or a stone left where it met aqua) closes each cell, if no
+    block is pushed from now on.
+
+    Liquids and timers evolve the same way whatever the player does, until
+    a block is pushed: blocks are the only thing the player can change
+    them with. So one simulation serves every node reached from here
+    without a push, each `turn` moves further along, and a push needs a
+    new forecast. Closed cells never reopen, since only a pushed block
+    can remove lava and stones stay forever.
+    """
+
+    def __init__(self, board, state: State):
+        self.board = board
+        # cell index -> turn it closes, for the cells that ever do
+        self.closes: dict[int, int] = {}
+        self.blocks = board.pack_bits(state.blocks)
+        self.number = next(NUMBERS)
+        self.keys: list[tuple] = []
+        self.simulate(state.copy(shared=True))
+
+    def simulate(self, state: State):
+        board = self.board
+        for position in (*state.lavas, *state.stones):
+            self.closes.setdefault(board.index(position), 0)
+        self.keys.append(liquid_key(board.pack(state)))
+
+        turn = 0
+        # spreads end once every cell reachable is filled; timers can
+        # reactivate them until the last one runs out
+        while state.aqua_frontier or state.lava_frontier or state.timers:
+            turn += 1
+            AquaSpreadCommand(state, state.aquas, state.aqua_frontier).run()
+            LavaSpreadCommand(state, state.lavas, state.lava_frontier).run()
+            TimerCommand(state, state.timers).run()
+            for position in (*state.lava_frontier, *state.stones):
+                self.closes.setdefault(board.index(position), turn)
+            self.keys.append(liquid_key(board.pack(state)))
+
+    def is_open(self, cell: int, turn: int) -> bool:
+        """Whether a player entering `cell` at `turn` survives the spread"""
+        return self.closes.get(cell, NEVER) > turn
+
+    def reach(self, start: int, turn: int) -> tuple[bool, int]:
+        """
+        Bitboard of the cells a player standing on `start` at `turn` can
+        still get to alive, and whether it can get to a block before lava
+        cuts it off. Stones, timers and blocks are walked through, so the
+        cells are a superset of the true ones. Results are shared through
+        the board's bounded `reached` cache.
+        """
+        board = self.board
+        key = (self.number, start, turn)
+        cached = board.reached.get(key)
+        if cached is not None:
+            return cached
+
+        seen = bytearray(board.width * board.height)
+        seen[start] = 1
+        cells = 1 << start
+        pushes = False
+        frontier = [start]
+        while frontier and not pushes:
+            turn += 1
+            next_frontier = []
+            for cell in frontier:
+                for neighbour in board.adjacent(cell):
+                    if seen[neighbour] or not self.is_open(neighbour, turn):
+                        continue
+                    if self.blocks >> neighbour & 1:
+                        pushes = True
+                    seen[neighbour] = 1
+                    cells |= 1 << neighbour
+                    next_frontier.append(neighbour)
+            frontier = next_frontier
+
+        return board.remember(board.reached, key, (pushes, cells))
+
+    def is_doomed(self, player: int, points: int, turn: int) -> bool:
+        """
+        Whether a player on `player` at `turn` can no longer collect every
+        point and reach the goal, with no block within reach to change
+        where lava goes.
+        """
+        if not self.is_open(player, turn):
+            return True
+        pushes, cells = self.reach(player, turn)
+        if pushes:
+            return False
+        return bool((points | 1 << self.board.goal) & ~cells)
+
+
+def liquid_key(node) -> tuple:
+    """The part of a SearchState that decides how liquids spread"""
+    return (node.lavas, node.aquas, node.stones, node.blocks, node.timers)
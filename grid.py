@@ -0,0 +1,83 @@
+from position import Position
+
+
+class Grid:
+    """
+    Static passability of a level, built once and shared by every copy of
+    a State.
+
+    Walls, containers and the world bounds never change, so whether a cell
+    can ever be entered is precomputed per cell index (index = y * width
+    + x), and which of its neighbours can is worked out the first time it
+    is asked for and kept. Players and blocks are stopped by walls and
+    containers ("walkable"); liquids only by walls ("floodable").
+    """
+
+    def __init__(self, width: int, height: int, walls, containers, moves):
+        self.width = width
+        self.height = height
+        # Position of each cell index, made by position() on first lookup:
+        # building them all up front took most of the load on large maps
+        self.positions: list[Position | None] = [None] * (width * height)
+        self.floodable = [True] * (width * height)
+        for pos in walls:
+            if self.index(pos) >= 0:
+                self.floodable[self.index(pos)] = False
+        self.walkable = list(self.floodable)
+        for pos in containers:
+            if self.index(pos) >= 0:
+                self.walkable[self.index(pos)] = False
+        self.offsets = [(move, int(move.x), int(move.y)) for move in moves]
+        # filled in per cell by neighbours(); building them all up front
+        # dominated load time on large maps
+        self.walk_neighbours: list[list | None] = [None] * (width * height)
+        self.flood_neighbours: list[list | None] = [None] * (width * height)
+
+    def build_neighbours(self, index: int, open_cells: list[bool]):
+        x = index % self.width
+        y = index // self.width
+        neighbours = []
+        for move, dx, dy in self.offsets:
+            nx = x + dx
+            ny = y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                neighbour = ny * self.width + nx
+                if open_cells[neighbour]:
+                    neighbours.append((move, self.position(neighbour)))
+        return neighbours
+
+    def position(self, index: int) -> Position:
+        position = self.positions[index]
+        if position is None:
+            position = self.positions[index] = Position(
+                index % self.width, index // self.width
+            )
+        return position
+
+    def index(self, position: Position) -> int:
+        x = int(position.x)
+        y = int(position.y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+
+    def is_open(self, position: Position, check_containers=True) -> bool:
+        index = self.index(position)
+        if index < 0:
+            return False
+        if check_containers:
+            return self.walkable[index]
+        return self.floodable[index]
+
+    def neighbours(self, position: Position, check_containers=True):
+        index = self.index(position)
+        if index < 0:
+            return []
+        if check_containers:
+            table, open_cells = self.walk_neighbours, self.walkable
+        else:
+            table, open_cells = self.flood_neighbours, self.floodable
+        neighbours = table[index]
+        if neighbours is None:
+            neighbours = table[index] = self.build_neighbours(index, open_cells)
+        return neighbours
@@ -1,64 +1,152 @@
-class HistoryManager:
-    """
-    Manages game state history for undo/redo operations.
-
-    Uses the Memento pattern to save and restore complete game states
-    """
-
-    def __init__(self, max_history_size: int = 100, state=None):
-        self.undo_stack = []
-        self.redo_stack = []
-        self.max_history_size = max_history_size
-        self.current_state = state
-
-    def save_state(self, state):
-        if self.current_state is not None:
-            self.undo_stack.append(self.current_state.copy())
-
-            if len(self.undo_stack) > self.max_history_size:
-                self.undo_stack.pop(0)
-
-        self.current_state = state
-
-        self.redo_stack.clear()
-
-    def undo(self):
-        if not self.can_undo():
-            return None
-
-        if self.current_state is not None:
-            self.redo_stack.append(self.current_state.copy())
-
-        previous_state = self.undo_stack.pop()
-        self.current_state = previous_state
-
-        return previous_state.copy()
-
-    def redo(self):
-        if not self.can_redo():
-            return None
-
-        if self.current_state is not None:
-            self.undo_stack.append(self.current_state.copy())
-
-        next_state = self.redo_stack.pop()
-        self.current_state = next_state
-
-        return next_state.copy()
-
-    def can_undo(self) -> bool:
-        return len(self.undo_stack) > 0
-
-    def can_redo(self) -> bool:
-        return len(self.redo_stack) > 0
-
-    def clear(self):
-        self.undo_stack.clear()
-        self.redo_stack.clear()
-        self.current_state = None
-
-    def get_undo_count(self) -> int:
-        return len(self.undo_stack)
-
-    def get_redo_count(self) -> int:
-        return len(self.redo_stack)
+from collections import deque
+
+from pygame.math import Vector2
+
+from bitboard import Board, SearchState
+from items import Item, Block, Liquid, Timer
+import zobrist
+
+
+# dict collections recorded cell by cell, with their hash kind and item type
+ENTITIES = {
+    "lavas": (zobrist.LAVA, Liquid),
+    "aquas": (zobrist.AQUA, Liquid),
+    "blocks": (zobrist.BLOCK, Block),
+    "points": (zobrist.POINT, Item),
+    "stones": (zobrist.STONE, Item),
+    "deads": (zobrist.DEAD, Item),
+}
+FRONTIERS = ("aqua_frontier", "lava_frontier")
+
+
+class Delta:
+    """
+    Cells changed by one move.
+
+    Entity and frontier changes are stored as the cells that were toggled,
+    which undoes and redoes the same way. The player and timers are stored
+    as before/after values since every move ticks the timers anyway.
+    """
+
+    __slots__ = ("cells", "player", "timers")
+
+    def __init__(self, before: SearchState, after: SearchState):
+        board = before.board
+        self.cells = []
+        for name in (*ENTITIES, *FRONTIERS):
+            changed = getattr(before, name) ^ getattr(after, name)
+            if changed:
+                self.cells.append((name, tuple(board.unpack_bits(changed))))
+        self.player = (
+            (before.player_position, before.status),
+            (after.player_position, after.status),
+        )
+        self.timers = (before.timers, after.timers)
+
+    def apply(self, state, board: Board, forward: bool):
+        target = 1 if forward else 0
+
+        for name, positions in self.cells:
+            collection = state.writable(name)
+            if name in FRONTIERS:
+                collection.symmetric_difference_update(positions)
+                continue
+            kind, item_type = ENTITIES[name]
+            for pos in positions:
+                if pos in collection:
+                    collection.pop(pos)
+                else:
+                    collection[pos] = item_type(state, pos, Vector2(0, 0))
+                state.update_hash(kind, pos)
+
+        timers = state.writable("timers")
+        for pos, timer in timers.items():
+            state.update_hash(zobrist.TIMER, pos, timer.duration)
+        timers.clear()
+        for index, duration in self.timers[target]:
+            pos = board.position(index)
+            timers[pos] = Timer(state, pos, Vector2(0, 0), duration)
+            state.update_hash(zobrist.TIMER, pos, duration)
+
+        position, status = self.player[target]
+        state.update_player_hash()
+        state.player.position = position
+        state.player.status = status
+        state.update_player_hash()
+
+
+class HistoryManager:
+    """
+    Manages game state history for undo/redo operations.
+
+    Instead of full state copies, each move is stored as a Delta of the
+    cells it changed and undo/redo replay it on the live state. The stacks
+    are ring buffers holding at most `max_history_size` moves (unbounded
+    when None).
+    """
+
+    def __init__(self, max_history_size: int | None = None, state=None):
+        self.undo_stack: deque[Delta] = deque(maxlen=max_history_size)
+        self.redo_stack: deque[Delta] = deque(maxlen=max_history_size)
+        self.max_history_size = max_history_size
+        self.current_state = state
+        self.board = Board(state) if state is not None else None
+        # packed snapshot taken before the move that is currently running
+        self.pending: SearchState | None = None
+
+    def flush(self):
+        if self.pending is None:
+            return
+        after = self.board.pack(self.current_state)
+        self.undo_stack.append(Delta(self.pending, after))
+        self.pending = None
+
+    def save_state(self, state):
+        self.flush()
+
+        if self.board is None:
+            self.board = Board(state)
+        self.current_state = state
+        self.pending = self.board.pack(state)
+
+        self.redo_stack.clear()
+
+    def undo(self):
+        self.flush()
+        if not self.can_undo():
+            return None
+
+        delta = self.undo_stack.pop()
+        delta.apply(self.current_state, self.board, forward=False)
+        self.redo_stack.append(delta)
+
+        return self.current_state
+
+    def redo(self):
+        self.flush()
+        if not self.can_redo():
+            return None
+
+        delta = self.redo_stack.pop()
+        delta.apply(self.current_state, self.board, forward=True)
+        self.undo_stack.append(delta)
+
+        return self.current_state
+
+    def can_undo(self) -> bool:
+        return len(self.undo_stack) > 0 or self.pending is not None
+
+    def can_redo(self) -> bool:
+        return len(self.redo_stack) > 0
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.current_state = None
+        self.pending = None
+
+    def get_undo_count(self) -> int:
+        return len(self.undo_stack) + (self.pending is not None)
+
+    def get_redo_count(self) -> int:
+        return len(self.redo_stack)
@@ -0,0 +1,94 @@
+import cProfile
+import json
+import time
+
+
+# Where an expansion spends its time:
+#   expand   - unpacking a node into a State and listing its moves
+#   copy     - the copy-on-write State.copy of each child
+#   simulate - MoveCommand.run: spreads, timers, observers, incremental hash
+#   pack     - packing the child into a hashable SearchState
+#   heap     - priority queue pushes and pops
+PHASES = ("expand", "copy", "simulate", "pack", "heap")
+
+
+class Instrumentation:
+    """
+    Opt-in measurements of a single search, attached to an Algorithm.
+
+    Phase times are summed over the whole search. Every `sample_every`
+    expansions the frontier size is sampled, and every `callback_every`
+    expansions `callback(algorithm, instrumentation)` is called. With
+    `profile`, a cProfile profiler runs for the duration of the search
+    only and can be dumped as pstats.
+    """
+
+    def __init__(
+        self,
+        sample_every: int = 100,
+        callback=None,
+        callback_every: int = 1000,
+        profile: bool = False,
+    ):
+        self.phases: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.expanded = 0
+        self.generated = 0
+        self.duplicates = 0
+        self.dead = 0
+        # (expansions so far, frontier size) pairs
+        self.frontier: list[tuple[int, int]] = []
+        self.sample_every = sample_every
+        self.callback = callback
+        self.callback_every = callback_every
+        self.profiler = cProfile.Profile() if profile else None
+        self.start_time: float | None = None
+        self.elapsed = 0.0
+
+    def begin(self):
+        self.start_time = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def end(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.start_time is not None:
+            self.elapsed += time.perf_counter() - self.start_time
+            self.start_time = None
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] += seconds
+
+    def step(self, algorithm):
+        self.expanded += 1
+        if self.expanded % self.sample_every == 0:
+            self.frontier.append((self.expanded, algorithm.get_frontier_size()))
+        if self.callback is not None and self.expanded % self.callback_every == 0:
+            self.callback(algorithm, self)
+
+    @property
+    def duplicate_rate(self) -> float:
+        # share of generated children that were already known to the search
+        return self.duplicates / self.generated if self.generated else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "elapsed": self.elapsed,
+            "phases": self.phases,
+            "other": max(0.0, self.elapsed - sum(self.phases.values())),
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "duplicates": self.duplicates,
+            "duplicate_rate": self.duplicate_rate,
+            "dead": self.dead,
+            "frontier": self.frontier,
+        }
+
+    def save(self, path: str):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def dump_stats(self, path: str):
+        if self.profiler is None:
+            raise ValueError("Instrumentation was created without profile=True")
+        self.profiler.dump_stats(path)
@@ -6,6 +6,7 @@ from pygame.math import Vector2
 from items import Item, Player, Timer
 from observers import Observer
 from position import Position
+import zobrist
 
 
 class Layer(ABC, Observer):
@@ -13,6 +14,8 @@ class Layer(ABC, Observer):
         self.cell_size = cell_size
         self.texture = pygame.image.load(image_file)
         self.font = pygame.font.Font(font_file, 24) if font_file else None
+        # (tile x, tile y, cell width, cell height) -> scaled tile surface
+        self.tile_cache: dict[tuple[float, float, int, int], pygame.Surface] = {}
 
     @property
     def cell_width(self):
@@ -41,6 +44,17 @@ class Layer(ABC, Observer):
         # Location on the screen
         sprite_point = position.elementwise() * self.cell_size
 
+        surface.blit(self.get_tile(tile), (int(sprite_point.x), int(sprite_point.y)))
+
+    def get_tile(self, tile):
+        key = (tile.x, tile.y, self.cell_width, self.cell_height)
+        scaled_texture = self.tile_cache.get(key)
+        if scaled_texture is None:
+            scaled_texture = self.cut_tile(tile)
+            self.tile_cache[key] = scaled_texture
+        return scaled_texture
+
+    def cut_tile(self, tile):
         # Texture
         texture_point = tile.elementwise() * self.cell_size
         texture_rect = pygame.Rect(
@@ -67,13 +81,31 @@ class Layer(ABC, Observer):
             texture_surface, (self.cell_width, self.cell_height)
         )
 
-        # Render the scaled tile at the sprite point
-        surface.blit(scaled_texture, (int(sprite_point.x), int(sprite_point.y)))
+        # Match the display's pixel format so blits need no conversion
+        if pygame.display.get_surface() is not None:
+            scaled_texture = scaled_texture.convert_alpha()
+
+        return scaled_texture
+
+    def invalidate(self):
+        # called when the window is resized
+        self.tile_cache.clear()
+
+    def dirty_cells(self) -> set[Position]:
+        """
+        Cells whose drawing changed since the previous call. Static layers
+        never change.
+        """
+        return set()
 
     @abstractmethod
     def render(self, surface):
         pass
 
+    @abstractmethod
+    def render_cell(self, surface, position: Position):
+        pass
+
 
 class ArrayLayer(Layer):
     def __init__(
@@ -101,10 +133,57 @@ class ArrayLayer(Layer):
 
         surface.blit(self.surface, (0, 0))
 
+    def render_cell(self, surface, position):
+        tile = self.array[int(position.y)][int(position.x)]
+        if not tile is None:
+            self.render_tile(surface, position.to_vector(), tile)
+
+    def invalidate(self):
+        super().invalidate()
+        self.surface = None
+
     def state_restored(self, new_state):
         self.state = new_state
 
 
+class BakedLayer(Observer):
+    """
+    Renders layers whose cells never change into one surface once, then
+    blits that surface every frame. The surface is rebuilt on invalidate().
+    """
+
+    def __init__(self, layers: list[Layer], surface_flags=pygame.SRCALPHA):
+        self.layers = layers
+        self.surface = None
+        self.surface_flags = surface_flags
+
+    def render(self, surface):
+        if self.surface is None:
+            self.surface = pygame.Surface(surface.get_size(), flags=self.surface_flags)
+            for layer in self.layers:
+                layer.render(self.surface)
+
+        surface.blit(self.surface, (0, 0))
+
+    def render_cell(self, surface, position):
+        # only valid after render() has baked the surface
+        rect = pygame.Rect(
+            int(position.x * self.layers[0].cell_width),
+            int(position.y * self.layers[0].cell_height),
+            self.layers[0].cell_width,
+            self.layers[0].cell_height,
+        )
+        surface.blit(self.surface, rect, rect)
+
+    def dirty_cells(self) -> set[Position]:
+        return set()
+
+    def invalidate(self):
+        for layer in self.layers:
+            layer.invalidate()
+        self.surface = None
+
+
 class GroundLayer(ArrayLayer):
     def state_restored(self, new_state):
         super().state_restored(new_state)
@@ -116,11 +195,23 @@ class UnitLayer(Layer):
         super().__init__(cell_size, image_file)
         self.state = state
         self.units = units
+        self.drawn: set[Position] = set()
 
     def render(self, surface):
         for unit in self.units.values():
             self.render_tile(surface, unit.position.to_vector(), unit.tile)
 
+    def render_cell(self, surface, position):
+        unit = self.units.get(position)
+        if unit is not None:
+            self.render_tile(surface, unit.position.to_vector(), unit.tile)
+
+    def dirty_cells(self) -> set[Position]:
+        current = set(self.units)
+        dirty = current ^ self.drawn
+        self.drawn = current
+        return dirty
+
     def state_restored(self, new_state):
         self.state = new_state
 
@@ -140,6 +231,8 @@ class ContainerLayer(UnitLayer):
 class StoneLayer(UnitLayer):
     def add(self, position: Position):
         new_stone = Item(self.state, position, Vector2(0, 0))
+        if position not in self.units:
+            self.state.update_hash(zobrist.STONE, position)
         self.units[position] = new_stone
         if self.state.player.position == position:
             self.state.notify_player_died(self.state.player)
@@ -163,7 +256,9 @@ class GoalLayer(Layer):
 
     def player_reached_goal(self, player):
         if self.state.is_points_empty():
+            self.state.update_player_hash()
             player.status = "won"
+            self.state.update_player_hash()
             self.state.notify_player_won(player)
 
     def state_restored(self, new_state):
@@ -173,17 +268,26 @@ class GoalLayer(Layer):
     def render(self, surface):
         self.render_tile(surface, self.goal.position.to_vector(), self.goal.tile)
 
+    def render_cell(self, surface, position):
+        if self.goal.position == position:
+            self.render(surface)
+
 
 class LiquidLayer(UnitLayer):
+    kind = None
+
     def reduce(self, position: Position):
         if position in self.units:
             self.units.pop(position)
+            self.state.update_hash(self.kind, position)
 
     def block_moved(self, block):
         self.reduce(block.position)
 
 
 class AquaLayer(LiquidLayer):
+    kind = zobrist.AQUA
+
     def lava_touched_aqua(self, position):
         self.reduce(position)
 
@@ -193,6 +297,8 @@ class AquaLayer(LiquidLayer):
 
 
 class LavaLayer(LiquidLayer):
+    kind = zobrist.LAVA
+
     def aqua_touched_lava(self, position):
         self.reduce(position)
 
@@ -206,9 +312,12 @@ class PlayerLayer(Layer):
         super().__init__(cell_size, image_file)
         self.state = state
         self.player = player
+        self.drawn: Position | None = None
 
     def player_died(self, player):
+        self.state.update_player_hash()
         self.player.status = "dead"
+        self.state.update_player_hash()
 
     def state_restored(self, new_state):
         self.state = new_state
@@ -217,10 +326,24 @@ class PlayerLayer(Layer):
     def render(self, surface):
         self.render_tile(surface, self.player.position.to_vector(), self.player.tile)
 
+    def render_cell(self, surface, position):
+        if self.player.position == position:
+            self.render(surface)
+
+    def dirty_cells(self) -> set[Position]:
+        current = self.player.position
+        if current == self.drawn:
+            return set()
+        dirty = {current} if self.drawn is None else {current, self.drawn}
+        self.drawn = current
+        return dirty
+
 
 class DeadLayer(UnitLayer):
     def add(self, position: Position):
         dead = Item(self.state, position, Vector2(0, 0))
+        if position not in self.units:
+            self.state.update_hash(zobrist.DEAD, position)
         self.units[position] = dead
 
     def player_died(self, player):
@@ -241,6 +364,7 @@ class PointLayer(UnitLayer):
     def update(self, position: Position):
         if position in self.units:
             self.units.pop(position)
+            self.state.update_hash(zobrist.POINT, position)
 
     def player_moved(self, player, move):
         self.update(player.position)
@@ -262,15 +386,34 @@ class TimerLayer(Layer):
         super().__init__(cell_size, image_file, font_file)
         self.state = state
         self.timers = timers
+        self.drawn: dict[Position, int] = {}
 
     def render(self, surface):
         for timer in self.timers.values():
-            self.render_tile(surface, timer.position.to_vector(), timer.tile)
-            self.render_font(
-                surface,
-                timer.position.to_vector(),
-                str(int(timer.duration)),
-            )
+            self.render_timer(surface, timer)
+
+    def render_timer(self, surface, timer: Timer):
+        self.render_tile(surface, timer.position.to_vector(), timer.tile)
+        self.render_font(
+            surface,
+            timer.position.to_vector(),
+            str(int(timer.duration)),
+        )
+
+    def render_cell(self, surface, position):
+        timer = self.timers.get(position)
+        if timer is not None:
+            self.render_timer(surface, timer)
+
+    def dirty_cells(self) -> set[Position]:
+        current = {pos: timer.duration for pos, timer in self.timers.items()}
+        dirty = {
+            pos
+            for pos in current.keys() | self.drawn.keys()
+            if current.get(pos) != self.drawn.get(pos)
+        }
+        self.drawn = current
+        return dirty
 
     def state_restored(self, new_state):
         self.state = new_state
@@ -231,6 +231,8 @@ class ButtonTheme:
     }
     TEAL = {"normal": (0, 137, 123), "hover": (38, 166, 154), "border": (0, 105, 92)}
     GOLD = {"normal": (255, 193, 7), "hover": (255, 224, 130), "border": (212, 175, 55)}
+    RED = {"normal": (198, 40, 40), "hover": (229, 115, 115), "border": (142, 0, 0)}
+    GRAY = {"normal": (84, 110, 122), "hover": (120, 144, 156), "border": (55, 71, 79)}
 
 
 # Add new algorithms here - just add a new AlgorithmConfig to this list
@@ -249,6 +251,21 @@ ALGORITHM_OPTIONS = [
         "Auto: Hill Climb", Algorithms.HILL_CLIMB, "Hill Climb", ButtonTheme.TEAL
     ),
     AlgorithmConfig("Auto: A*", Algorithms.A_STAR, "A* Search", ButtonTheme.GOLD),
+    AlgorithmConfig(
+        "Auto: IDA*", Algorithms.IDA_STAR, "Iterative Deepening A*", ButtonTheme.RED
+    ),
+    AlgorithmConfig(
+        "Auto: Portfolio",
+        Algorithms.PORTFOLIO,
+        "Races several at once",
+        ButtonTheme.GRAY,
+    ),
+    AlgorithmConfig(
+        "Auto: Optimal",
+        Algorithms.PORTFOLIO_OPTIMAL,
+        "Races the optimal ones",
+        ButtonTheme.GRAY,
+    ),
 ]
 
 
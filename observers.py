@@ -4,6 +4,7 @@ from pygame.math import Vector2
 
 from items import Item, Block, Player
 from position import Position
+import zobrist
 
 if TYPE_CHECKING:
     from state import State
@@ -46,7 +47,9 @@ class StateObserver(Observer):
 class StoneObserver(StateObserver):
     def add(self, position: Position):
         new_stone = Item(self.state, position, Vector2(0, 0))
-        self.state.stones[position] = new_stone
+        if position not in self.state.stones:
+            self.state.update_hash(zobrist.STONE, position)
+        self.state.writable("stones")[position] = new_stone
         if self.state.player.position == position:
             self.state.notify_player_died(self.state.player)
 
@@ -60,14 +63,17 @@ class StoneObserver(StateObserver):
 class GoalObserver(StateObserver):
     def player_reached_goal(self, player):
         if self.state.is_points_empty():
+            self.state.update_player_hash()
             player.status = "won"
+            self.state.update_player_hash()
             self.state.notify_player_won(player)
 
 
 class AquaObserver(StateObserver):
     def reduce(self, position: Position):
         if position in self.state.aquas:
-            self.state.aquas.pop(position)
+            self.state.writable("aquas").pop(position)
+            self.state.update_hash(zobrist.AQUA, position)
 
     def block_moved(self, block):
         self.reduce(block.position)
@@ -79,7 +85,8 @@ class AquaObserver(StateObserver):
 class LavaObserver(StateObserver):
     def reduce(self, position: Position):
         if position in self.state.lavas:
-            self.state.lavas.pop(position)
+            self.state.writable("lavas").pop(position)
+            self.state.update_hash(zobrist.LAVA, position)
 
     def block_moved(self, block):
         self.reduce(block.position)
@@ -90,13 +97,17 @@ class LavaObserver(StateObserver):
 
 class PlayerObserver(StateObserver):
     def player_died(self, player):
+        self.state.update_player_hash()
         player.status = "dead"
+        self.state.update_player_hash()
 
 
 class DeadObserver(StateObserver):
     def add(self, position: Position):
         dead = Item(self.state, position, Vector2(0, 0))
-        self.state.deads[position] = dead
+        if position not in self.state.deads:
+            self.state.update_hash(zobrist.DEAD, position)
+        self.state.writable("deads")[position] = dead
 
     def player_died(self, player):
         self.add(player.position)
@@ -105,7 +116,8 @@ class DeadObserver(StateObserver):
 class PointObserver(StateObserver):
     def update(self, position: Position):
         if position in self.state.points:
-            self.state.points.pop(position)
+            self.state.writable("points").pop(position)
+            self.state.update_hash(zobrist.POINT, position)
 
     def player_moved(self, player, move):
         self.update(player.position)
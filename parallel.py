@@ -0,0 +1,210 @@
+"""
+Breadth-first search over several processes.
+
+States are partitioned by fingerprint: worker `i` of `n` owns every state
+whose fingerprint is `i` modulo `n`, and alone keeps those in its closed
+set, with their parent links. The search runs one layer at a time: each
+worker takes the children sent to it, drops the ones it has seen, expands
+the rest and sorts their children by owner, and the coordinating process
+forwards them for the next layer over pipes.
+"""
+
+import multiprocessing
+import os
+from collections import deque
+
+from algorithms import Algorithm
+from bitboard import Board
+from compact import (
+    MOVE_BYTES,
+    MOVES,
+    NO_MOVE,
+    FingerprintTable,
+    fingerprint,
+    node_fields,
+    node_from_fields,
+)
+from position import Position
+from state import State
+
+
+class Partition(Algorithm):
+    """One worker's share of a ParallelBFS: its closed set and expansions"""
+
+    def __init__(self, index: int, workers: int):
+        self.index = index
+        self.workers = workers
+        self.closed = FingerprintTable()
+        self.nodes: int = 0
+        self.visited_count: int = 0
+        self.board: Board | None = None
+
+    def __call__(self, state: State):
+        self.board = Board(state)
+
+    def expand_layer(self, entries: list[tuple]) -> tuple[list[list], int | None]:
+        """
+        Close the new states among `entries` and expand them; returns
+        their children grouped by owner, and the fingerprint of a won
+        state if one came in.
+        """
+        outgoing: list[list] = [[] for _ in range(self.workers)]
+        sent: set[int] = set()
+        for fields, parent, move_byte in entries:
+            node = node_from_fields(self.board, fields)
+            key = fingerprint(node)
+            if not self.closed.add(key, parent, move_byte):
+                self.duplicate_hit()
+                continue
+            self.visited_count += 1
+            if node.is_won():
+                return outgoing, key
+
+            state, moves = self.expand(node)
+            for move in moves:
+                child = self.apply_move(state, move)
+                if self.is_dead(child):
+                    continue
+                child_key = fingerprint(child)
+                # siblings and cousins often meet again within a layer
+                if child_key in sent:
+                    self.duplicate_hit()
+                    continue
+                sent.add(child_key)
+                self.nodes += 1
+                outgoing[child_key % self.workers].append(
+                    (node_fields(child), key, MOVE_BYTES[move])
+                )
+        return outgoing, None
+
+    def get_nodes(self) -> int:
+        return self.nodes
+
+    def get_visited_count(self) -> int:
+        return self.visited_count
+
+    def get_path(self) -> deque[Position]:
+        return deque()
+
+
+def partition_worker(conn, state: State, index: int, workers: int, coordinator_ends):
+    # forked workers inherit the coordinator's end of every pipe; closing
+    # them lets the coordinator's exit reach this worker as EOF
+    for end in coordinator_ends:
+        end.close()
+    partition = Partition(index, workers)
+    partition(state)
+    try:
+        while True:
+            command, argument = conn.recv()
+            if command == "layer":
+                outgoing, won = partition.expand_layer(argument)
+                conn.send((outgoing, won, partition.nodes, partition.visited_count))
+            elif command == "parent":
+                conn.send(partition.closed.get(argument))
+            else:
+                break
+    except (EOFError, BrokenPipeError):
+        # the coordinating process is gone
+        pass
+    finally:
+        conn.close()
+
+
+class ParallelBFS(Algorithm):
+    """
+    BFS with states hash-partitioned over `workers` processes (default:
+    one per CPU), expanded one layer at a time. Returns shortest paths,
+    like BFS, unless two states share a fingerprint. Only pays off where
+    layers are wide enough to outweigh sending every child through pipes.
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.nodes: int = 0
+        self.visited_count: int = 0
+        self.layers: int = 0
+        self.path: deque[Position] = deque()
+        self.board: Board | None = None
+
+    def __call__(self, state: State):
+        self.board = Board(state)
+        root = self.board.pack(state)
+        self.nodes += 1
+        if root.is_won():
+            return
+
+        connections = []
+        processes = []
+        try:
+            for index in range(self.workers):
+                conn, worker_conn = multiprocessing.Pipe()
+                connections.append(conn)
+                process = multiprocessing.Process(
+                    target=partition_worker,
+                    args=(worker_conn, state, index, self.workers, connections),
+                    daemon=True,
+                )
+                process.start()
+                worker_conn.close()
+                processes.append(process)
+            self.search(root, connections)
+            for conn in connections:
+                conn.send(("stop", None))
+        finally:
+            for process in processes:
+                process.join(timeout=1)
+                if process.is_alive():
+                    # not terminate(): SIGTERM may only queue an SDL quit
+                    process.kill()
+            for conn in connections:
+                conn.close()
+
+    def search(self, root, connections: list):
+        layer: list[list] = [[] for _ in connections]
+        root_key = fingerprint(root)
+        layer[root_key % self.workers].append((node_fields(root), 0, NO_MOVE))
+        won = None
+        while any(layer) and won is None and not self.cancelled:
+            self.layers += 1
+            self.frontier_size = sum(len(entries) for entries in layer)
+            for conn, entries in zip(connections, layer):
+                conn.send(("layer", entries))
+
+            layer = [[] for _ in connections]
+            nodes = 1
+            visited_count = 0
+            for conn in connections:
+                outgoing, found, worker_nodes, worker_visited = conn.recv()
+                for entries, incoming in zip(layer, outgoing):
+                    entries.extend(incoming)
+                if found is not None:
+                    won = found
+                nodes += worker_nodes
+                visited_count += worker_visited
+            self.nodes = nodes
+            self.visited_count = visited_count
+
+        if won is not None:
+            self.path = self.trace(won, connections)
+
+    def trace(self, key: int, connections: list) -> deque[Position]:
+        """Follow parent links from `key` back to the root, asking owners"""
+        path: deque[Position] = deque()
+        while True:
+            conn = connections[key % self.workers]
+            conn.send(("parent", key))
+            parent, move_byte = conn.recv()
+            if move_byte == NO_MOVE:
+                return path
+            path.appendleft(MOVES[move_byte])
+            key = parent
+
+    def get_nodes(self) -> int:
+        return self.nodes
+
+    def get_visited_count(self) -> int:
+        return self.visited_count
+
+    def get_path(self) -> deque[Position]:
+        return self.path
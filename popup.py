@@ -206,3 +206,59 @@ class VictoryPopup:
         for button in self.buttons:
             button.render(surface, self.button_font)
 
+
+class SolvingPopup:
+    def __init__(self, window_size):
+        self.window_size = window_size
+        self.visible = False
+        self.lines = []
+
+        # Load fonts
+        self.title_font = pygame.font.Font("fonts/NotoSans-Bold.ttf", 36)
+        self.text_font = pygame.font.Font("fonts/NotoSans-Bold.ttf", 20)
+
+        # Colors
+        self.title_color = (100, 180, 255)  # Blue while searching
+        self.text_color = (200, 200, 200)
+        self.hint_color = (150, 150, 150)
+
+    def show(self):
+        """Show the popup"""
+        self.visible = True
+        self.lines = []
+
+    def hide(self):
+        """Hide the popup"""
+        self.visible = False
+
+    def set_progress(self, lines):
+        """Replace the progress lines shown under the title"""
+        self.lines = lines
+
+    def render(self, surface):
+        if not self.visible:
+            return
+
+        # Create semi-transparent overlay
+        overlay = pygame.Surface((self.window_size.x, self.window_size.y))
+        overlay.set_alpha(180)
+        overlay.fill((0, 0, 0))
+        surface.blit(overlay, (0, 0))
+
+        # Draw title
+        center_x = self.window_size.x / 2
+        top = self.window_size.y / 2 - 30 * (len(self.lines) + 3) / 2
+        title_text = self.title_font.render("Solving...", True, self.title_color)
+        title_rect = title_text.get_rect(center=(center_x, top))
+        surface.blit(title_text, title_rect)
+
+        # Draw progress lines
+        for i, line in enumerate(self.lines):
+            line_text = self.text_font.render(line, True, self.text_color)
+            line_rect = line_text.get_rect(center=(center_x, top + 50 + 30 * i))
+            surface.blit(line_text, line_rect)
+
+        # Draw hint
+        hint_text = self.text_font.render("Press ESC to cancel", True, self.hint_color)
+        hint_rect = hint_text.get_rect(center=(center_x, top + 70 + 30 * len(self.lines)))
+        surface.blit(hint_text, hint_rect)
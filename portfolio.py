@@ -0,0 +1,197 @@
+import multiprocessing
+import threading
+from collections import deque
+from multiprocessing.connection import wait
+
+from algorithms import Algorithm, Algorithms
+from commands import MoveCommand
+from position import MOVE_NAMES, MOVES_BY_NAME, Position
+from state import State
+
+# algorithms whose paths have the fewest moves possible
+OPTIMAL = frozenset(
+    {
+        Algorithms.BFS,
+        Algorithms.A_STAR,
+        Algorithms.IDA_STAR,
+        Algorithms.BFS_COMPACT,
+        Algorithms.A_STAR_COMPACT,
+        Algorithms.BFS_PARALLEL,
+    }
+)
+# raced by default: quick greedy searches next to optimal ones
+MEMBERS = (
+    Algorithms.HILL_CLIMB,
+    Algorithms.A_STAR,
+    Algorithms.DFS,
+    Algorithms.IDA_STAR,
+)
+OPTIMAL_MEMBERS = (Algorithms.A_STAR, Algorithms.IDA_STAR, Algorithms.BFS)
+# seconds between checks for cancellation while the members run
+POLL_INTERVAL = 0.1
+
+
+class PortfolioFailed(RuntimeError):
+    """Every member of a portfolio failed before finishing its search"""
+
+
+def watch_portfolio(lifeline, member: Algorithm):
+    # nothing is ever sent: EOF means the portfolio's process is gone,
+    # killed along with a batch job, say, without killing its members
+    try:
+        lifeline.recv()
+    except EOFError:
+        member.cancel()
+
+
+def run_member(
+    conn, lifeline, portfolio_ends, create, algorithm: Algorithms, state: State
+):
+    # forked members inherit the portfolio's end of every pipe opened
+    # before them; closing them lets the portfolio's exit reach each
+    # member as EOF on its lifeline
+    for end in portfolio_ends:
+        end.close()
+    try:
+        member = create(algorithm)
+        threading.Thread(
+            target=watch_portfolio, args=(lifeline, member), daemon=True
+        ).start()
+        member(state)
+        moves = "".join(MOVE_NAMES[move] for move in member.get_path())
+        conn.send((moves, member.get_nodes(), member.get_visited_count(), None))
+    except BrokenPipeError:
+        # the portfolio is gone, there is no one to report to
+        pass
+    except Exception as error:
+        # reported as the reason the member failed
+        try:
+            conn.send((None, 0, 0, type(error).__name__))
+        except BrokenPipeError:
+            pass
+    finally:
+        conn.close()
+
+
+def is_solution(state: State, path: deque[Position]) -> bool:
+    state = state.copy()
+    for move in path:
+        MoveCommand(state, state.player, move).run()
+    return state.player.status == "won"
+
+
+class Portfolio(Algorithm):
+    """
+    Races several algorithms, each in its own process, and keeps the first
+    path that replays to a win. With `optimal`, only paths from algorithms
+    that find the fewest moves count. The rest are killed as soon as
+    one wins.
+
+    `create(algorithm)` builds each member's Algorithm in its process.
+    Members run in daemon processes, so they cannot start processes of
+    their own: ParallelBFS and Portfolio are refused. A member cancels
+    itself when the portfolio's process dies without stopping it.
+
+    If every member fails before finishing its search, by raising (say,
+    MemoryError) or dying, the race raises PortfolioFailed with each
+    member's reason rather than reporting no path, so that the failure is
+    not taken for an unsolvable level.
+    """
+
+    def __init__(
+        self,
+        create,
+        members: list[Algorithms] | None = None,
+        optimal: bool = False,
+    ):
+        members = list(members or (OPTIMAL_MEMBERS if optimal else MEMBERS))
+        for member in members:
+            if member in (
+                Algorithms.BFS_PARALLEL,
+                Algorithms.PORTFOLIO,
+                Algorithms.PORTFOLIO_OPTIMAL,
+            ):
+                raise ValueError(f"{member.value} cannot be a portfolio member")
+        self.create = create
+        self.members = members
+        self.optimal = optimal
+        self.winner: Algorithms | None = None
+        self.nodes: int = 0
+        self.visited_count: int = 0
+        self.path: deque[Position] = deque()
+
+    def accepts(self, algorithm: Algorithms) -> bool:
+        return not self.optimal or algorithm in OPTIMAL
+
+    def __call__(self, state: State):
+        running = {}
+        # ends kept here of every member's result and lifeline pipes
+        ends = []
+        try:
+            for algorithm in self.members:
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                lifeline, keeper = multiprocessing.Pipe(duplex=False)
+                ends += (receiver, keeper)
+                process = multiprocessing.Process(
+                    target=run_member,
+                    args=(sender, lifeline, ends, self.create, algorithm, state),
+                    daemon=True,
+                )
+                process.start()
+                sender.close()
+                lifeline.close()
+                running[receiver] = (algorithm, process)
+            self.race(state, running)
+        finally:
+            for _, process in running.values():
+                # SIGKILL: forked from a pygame process, members may have
+                # inherited SDL's SIGTERM handler, which only queues a quit
+                process.kill()
+                process.join()
+            for end in ends:
+                end.close()
+
+    def race(self, state: State, running: dict):
+        # why each member that did not finish its search failed
+        failures = {}
+        finished = False
+        while running and not self.cancelled:
+            self.frontier_size = len(running)
+            for receiver in wait(list(running), timeout=POLL_INTERVAL):
+                algorithm, process = running.pop(receiver)
+                try:
+                    moves, nodes, visited_count, error = receiver.recv()
+                except EOFError:
+                    moves = None
+                    error = None
+                receiver.close()
+                process.join()
+                if moves is None:
+                    # a member that died without a result has only its exit code
+                    failures[algorithm] = error or f"exit code {process.exitcode}"
+                    continue
+                finished = True
+                if not moves or not self.accepts(algorithm):
+                    continue
+
+                path = deque(MOVES_BY_NAME[name] for name in moves)
+                if is_solution(state, path):
+                    self.winner = algorithm
+                    self.path = path
+                    self.nodes = nodes
+                    self.visited_count = visited_count
+                    return
+        if not finished and not self.cancelled:
+            reasons = ", ".join(
+                f"{algorithm.value}: {reason}" for algorithm, reason in failures.items()
+            )
+            raise PortfolioFailed(f"every member failed ({reasons})")
+
+    def get_nodes(self) -> int:
+        return self.nodes
+
+    def get_visited_count(self) -> int:
+        return self.visited_count
+
+    def get_path(self) -> deque[Position]:
+        return self.path
@@ -22,3 +22,14 @@ class Position:
 
     def __eq__(self, other) -> bool:
         return isinstance(other, Position) and (self.x, self.y) == (other.x, other.y)
+
+
+# letters used when a path is written out as text
+MOVE_NAMES = {
+    Position(0, -1): "U",
+    Position(0, 1): "D",
+    Position(-1, 0): "L",
+    Position(1, 0): "R",
+}
+# and back, to read a written-out path
+MOVES_BY_NAME = {name: move for move, name in MOVE_NAMES.items()}
@@ -0,0 +1,178 @@
+"""
+Headless batch solver.
+
+Solves level files with one or all algorithms without opening a window and
+prints one JSON object per (level, algorithm) job on stdout:
+
+    python solve.py levels -a bfs
+    python solve.py levels/level3.txt levels/level5.txt -a all --no-memory
+    python solve.py levels -j 8 --timeout 60 --memory-limit 2048
+    python solve.py levels/level5.txt -a a_star --instrument stats --profile
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from algorithms import Algorithms
+from batch import run_jobs, solve_level
+
+
+def level_number(path: str):
+    # "levels/level12.txt" -> 12, unnumbered files sort last by name
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        return (0, int(name.replace("level", "")), name)
+    except ValueError:
+        return (1, 0, name)
+
+
+def find_levels(paths: list[str]) -> list[str]:
+    """Expand directories into their level files, numerically sorted"""
+    levels = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = [
+                os.path.join(path, filename)
+                for filename in os.listdir(path)
+                if filename.endswith(".txt") and filename != "test.txt"
+            ]
+            levels.extend(sorted(found, key=level_number))
+        else:
+            levels.append(path)
+    return levels
+
+
+def parse_algorithms(names: list[str]) -> list[Algorithms]:
+    if "all" in names:
+        return list(Algorithms)
+    return [Algorithms(name) for name in names]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Solve Lava & Aqua levels headlessly")
+    parser.add_argument(
+        "levels",
+        nargs="*",
+        default=["levels"],
+        help="level files or directories of level files (default: levels)",
+    )
+    parser.add_argument(
+        "-a",
+        "--algorithm",
+        action="append",
+        choices=[algorithm.value for algorithm in Algorithms] + ["all"],
+        help="algorithm to run, may be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="skip tracemalloc peak-memory tracking, which slows the search",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="solve in this many worker processes (0: one per CPU)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="seconds before a job is stopped (runs jobs in worker processes)",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        help="address-space cap per job in MiB (runs jobs in worker processes)",
+    )
+    parser.add_argument(
+        "--instrument",
+        metavar="DIR",
+        help="save phase timings, frontier samples and duplicate rates here",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="with --instrument, also save a cProfile .pstats per job",
+    )
+    parser.add_argument(
+        "--depth-limit",
+        type=int,
+        metavar="MOVES",
+        help="stop dfs and hill_climb at this many moves (others ignore it)",
+    )
+    args = parser.parse_args(argv)
+    if args.depth_limit is not None and args.depth_limit < 1:
+        parser.error("--depth-limit must be at least 1")
+    if args.profile and args.instrument is None:
+        parser.error("--profile requires --instrument")
+    return args
+
+
+def solve_all(args, jobs: list[tuple[str, Algorithms]]):
+    track_memory = not args.no_memory
+    if args.instrument is not None:
+        os.makedirs(args.instrument, exist_ok=True)
+    if args.jobs == 1 and args.timeout is None and args.memory_limit is None:
+        for level_file, algorithm in jobs:
+            yield solve_level(
+                level_file,
+                algorithm,
+                track_memory,
+                args.instrument,
+                args.profile,
+                args.depth_limit,
+            )
+        return
+
+    memory_limit = None
+    if args.memory_limit is not None:
+        memory_limit = args.memory_limit * 1024 * 1024
+    yield from run_jobs(
+        jobs,
+        workers=args.jobs or None,
+        timeout=args.timeout,
+        memory_limit=memory_limit,
+        track_memory=track_memory,
+        instrument_dir=args.instrument,
+        profile=args.profile,
+        depth_limit=args.depth_limit,
+    )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    algorithms = parse_algorithms(args.algorithm or ["all"])
+    jobs = [
+        (level_file, algorithm)
+        for level_file in find_levels(args.levels)
+        for algorithm in algorithms
+    ]
+
+    solved = 0
+    errors = 0
+    start_time = time.perf_counter()
+    for record in solve_all(args, jobs):
+        if "error" in record:
+            errors += 1
+        elif record["solved"]:
+            solved += 1
+        print(json.dumps(record), flush=True)
+
+    elapsed = time.perf_counter() - start_time
+    unsolved = len(jobs) - solved - errors
+    print(
+        f"{len(jobs)} jobs: {solved} solved, {unsolved} unsolved, "
+        f"{errors} errors in {elapsed:.2f}s",
+        file=sys.stderr,
+    )
+    return 0 if solved == len(jobs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
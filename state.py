@@ -1,5 +1,7 @@
 from pygame.math import Vector2
 
+from compiled_levels import CompiledLevel, load_compiled
+from grid import Grid
 from items import Item, Block, Liquid, Player, Timer
 from observers import (
     StoneObserver,
@@ -11,11 +13,30 @@ from observers import (
     LavaObserver,
 )
 from position import Position
+import zobrist
 
 
 class State:
+    # collections a shared copy reuses until one side writes to them
+    COPY_ON_WRITE = (
+        "lavas",
+        "aquas",
+        "blocks",
+        "points",
+        "deads",
+        "stones",
+        "timers",
+        "aqua_frontier",
+        "lava_frontier",
+    )
+
     def __init__(self, level_file="levels/level1.txt"):
-        level_data, world_size = self.read_level_file(level_file)
+        # a fresh compiled copy of the level skips text parsing
+        compiled = load_compiled(level_file)
+        if compiled is not None:
+            world_size = Vector2(compiled.width, compiled.height)
+        else:
+            level_data, world_size = self.read_level_file(level_file)
         self.world_size = world_size
         self.moves = [Position(0, 1), Position(0, -1), Position(1, 0), Position(-1, 0)]
         self.ground = []
@@ -30,20 +51,26 @@ class State:
         self.walls: dict[Position, Item] = {}
         self.deads: dict[Position, Item] = {}
         self.stones: dict[Position, Item] = {}
-        self.parse_level(level_data)
+        self.shared: set[str] = set()
+        if compiled is not None:
+            self.parse_compiled_level(compiled)
+        else:
+            self.parse_level(level_data)
+        self.grid = Grid(
+            self.world_width,
+            self.world_height,
+            self.walls,
+            self.containers,
+            self.moves,
+        )
+        self.aqua_frontier: set[Position] = set(self.aquas)
+        self.lava_frontier: set[Position] = set(self.lavas)
         self.ground = [
             [Vector2(0, 0) for _ in range(int(self.world_size.x))]
             for _ in range(int(self.world_size.y))
         ]
-        self.observers = [
-            StoneObserver(self),
-            PointObserver(self),
-            DeadObserver(self),
-            PlayerObserver(self),
-            GoalObserver(self),
-            AquaObserver(self),
-            LavaObserver(self),
-        ]
+        self.observers = self.create_observers()
+        self.zobrist = self.compute_hash()
         if not self.goal:
             raise ValueError("No goal found in level file")
         if not self.player:
@@ -57,6 +84,17 @@ class State:
     def world_height(self):
         return int(self.world_size.y)
 
+    def create_observers(self):
+        return [
+            StoneObserver(self),
+            PointObserver(self),
+            DeadObserver(self),
+            PlayerObserver(self),
+            GoalObserver(self),
+            AquaObserver(self),
+            LavaObserver(self),
+        ]
+
     def add_observer(self, observer):
         self.observers.append(observer)
 
@@ -95,28 +133,90 @@ class State:
         for observer in self.observers:
             observer.state_restored(self)
 
+    def compute_hash(self) -> int:
+        value = 0
+        for kind, units in (
+            (zobrist.LAVA, self.lavas),
+            (zobrist.AQUA, self.aquas),
+            (zobrist.BLOCK, self.blocks),
+            (zobrist.POINT, self.points),
+            (zobrist.STONE, self.stones),
+            (zobrist.DEAD, self.deads),
+        ):
+            for pos in units:
+                value ^= zobrist.key(kind, pos.x, pos.y)
+        for pos, timer in self.timers.items():
+            value ^= zobrist.key(zobrist.TIMER, pos.x, pos.y, timer.duration)
+        if self.player:
+            position = self.player.position
+            status = zobrist.STATUS[self.player.status]
+            value ^= zobrist.key(zobrist.PLAYER, position.x, position.y, status)
+        return value
+
+    def update_hash(self, kind: int, position: Position, value: int = 0):
+        self.zobrist ^= zobrist.key(kind, position.x, position.y, value)
+
+    def update_player_hash(self):
+        # call once before and once after changing the player's position or status
+        status = zobrist.STATUS[self.player.status]
+        self.update_hash(zobrist.PLAYER, self.player.position, status)
+
+    def writable(self, name: str, clear=False):
+        """
+        Return the collection `name`, cloning it first if it is still shared
+        with another copy. With `clear`, return it emptied instead.
+        """
+        collection = getattr(self, name)
+        if name not in self.shared:
+            if clear:
+                collection.clear()
+            return collection
+
+        self.shared.discard(name)
+        if clear:
+            collection = type(collection)()
+        elif name == "timers":
+            # timers are decremented in place, so they need their own objects
+            collection = {
+                pos: Timer(self, pos, timer.tile, timer.duration)
+                for pos, timer in collection.items()
+            }
+        else:
+            collection = collection.copy()
+        setattr(self, name, collection)
+        return collection
+
+    def activate_neighbours(self, position: Position):
+        # put liquids next to a newly freed cell back on their frontier
+        for _, neighbour in self.grid.neighbours(position, check_containers=False):
+            if neighbour in self.aquas:
+                self.writable("aqua_frontier").add(neighbour)
+            if neighbour in self.lavas:
+                self.writable("lava_frontier").add(neighbour)
+
     def get_possible_moves(self, position: Position, **kwargs) -> list[Position]:
         possible_moves = []
-        for move in self.moves:
-            new_pos = Position.from_vector(position.to_vector() + move.to_vector())
-            if self.can_move(new_pos, **kwargs):
+        check_containers = kwargs.get("check_containers", True)
+        for move, new_pos in self.grid.neighbours(position, check_containers):
+            if self.is_unblocked(new_pos, **kwargs):
                 possible_moves.append(move)
         return possible_moves
 
     def can_move(self, position: Position, **kwargs):
-        if position in self.walls:
+        # walls, containers and world bounds come from the precomputed grid
+        if not self.grid.is_open(position, kwargs.get("check_containers", True)):
             return False
 
+        return self.is_unblocked(position, **kwargs)
+
+    def is_unblocked(self, position: Position, **kwargs):
+        # dynamic half of can_move, for cells already known to be open
         if position in self.stones:
             return False
 
         if position in self.timers:
             return False
 
-        if kwargs.get("check_containers", True):
-            if position in self.containers:
-                return False
-
         if kwargs.get("check_blocks", True):
             if position in self.blocks:
                 return False
@@ -125,7 +225,7 @@ class State:
             if position in self.lavas:
                 return False
 
-        return self.is_inside(position)
+        return True
 
     def is_inside(self, position: Position):
         return (
@@ -180,6 +280,36 @@ class State:
                     Vector2(0, 0),
                 )
 
+    def parse_compiled_level(self, level: CompiledLevel):
+        width = level.width
+        tables = level.tables
+        collections = {
+            "walls": (self.walls, Item),
+            "containers": (self.containers, Item),
+            "lavas": (self.lavas, Liquid),
+            "aquas": (self.aquas, Liquid),
+            "blocks": (self.blocks, Block),
+            "points": (self.points, Item),
+        }
+        for kind, (collection, item_type) in collections.items():
+            for index in tables[kind]:
+                pos = Position(index % width, index // width)
+                collection[pos] = item_type(self, pos, Vector2(0, 0))
+
+        for index, duration in zip(tables["timers"], level.durations):
+            pos = Position(index % width, index // width)
+            self.timers[pos] = Timer(self, pos, Vector2(0, 0), duration)
+
+        # like the text parser, the last goal or player in the grid wins
+        if tables["goal"]:
+            index = tables["goal"][-1]
+            pos = Position(index % width, index // width)
+            self.goal = Item(self, pos, Vector2(0, 0))
+        if tables["player"]:
+            index = tables["player"][-1]
+            pos = Position(index % width, index // width)
+            self.player = Player(self, pos, Vector2(0, 0))
+
     def read_level_file(self, filename):
         level_data = []
         world_size = Vector2(0, 0)
@@ -196,7 +326,14 @@ class State:
 
         return level_data, world_size
 
-    def copy(self):
+    def copy(self, shared=False):
+        """
+        Copy the state. With `shared`, the copy is copy-on-write: entity
+        collections are shared with this state and cloned by `writable` on
+        the first write from either side. Solvers use this for expansions;
+        the UI keeps eager copies because its layers hold direct references
+        to the collections.
+        """
         # Create a new State instance without calling __init__
         cls = self.__class__
         new_state = cls.__new__(cls)
@@ -207,6 +344,25 @@ class State:
         new_state.ground = self.ground
         new_state.walls = self.walls
         new_state.containers = self.containers
+        new_state.grid = self.grid
+        new_state.observers = new_state.create_observers()
+        new_state.zobrist = self.zobrist
+
+        if shared:
+            for name in self.COPY_ON_WRITE:
+                setattr(new_state, name, getattr(self, name))
+            self.shared.update(self.COPY_ON_WRITE)
+            new_state.shared = set(self.COPY_ON_WRITE)
+            new_state.goal = self.goal
+            new_state.player = Player(
+                new_state,
+                self.player.position,
+                self.player.tile,
+            )
+            new_state.player.status = self.player.status
+            return new_state
+
+        new_state.shared = set()
 
         # Copy item lists, but recreate items with new state reference
         new_state.lavas = {
@@ -217,6 +373,8 @@ class State:
             pos: Liquid(new_state, liq.position, liq.tile.copy())
             for pos, liq in self.aquas.items()
         }
+        new_state.aqua_frontier = set(self.aqua_frontier)
+        new_state.lava_frontier = set(self.lava_frontier)
         new_state.blocks = {
             pos: Block(new_state, block.position, block.tile.copy())
             for pos, block in self.blocks.items()
@@ -253,32 +411,11 @@ class State:
             for pos, timer in self.timers.items()
         }
 
-        new_state.observers = [
-            StoneObserver(new_state),
-            PointObserver(new_state),
-            DeadObserver(new_state),
-            PlayerObserver(new_state),
-            GoalObserver(new_state),
-            AquaObserver(new_state),
-            LavaObserver(new_state),
-        ]
-
         return new_state
 
     def __hash__(self) -> int:
-        # lavas, aquas, blocks, player, points, timers, deads, and stones
-        return hash(
-            (
-                frozenset(self.lavas.keys()),
-                frozenset(self.aquas.keys()),
-                frozenset(self.blocks.keys()),
-                (self.player.position, self.player.status),
-                frozenset(self.points.keys()),
-                frozenset((pos, timer.duration) for pos, timer in self.timers.items()),
-                frozenset(self.deads.keys()),
-                frozenset(self.stones.keys()),
-            )
-        )
+        # maintained incrementally by the commands and observers
+        return self.zobrist
 
     def __lt__(self, other) -> bool:
         return len(self.lavas) < len(other.lavas)
@@ -6,6 +6,7 @@ from pygame import Vector2
 from state import State
 from observers import Observer
 from layers import (
+    BakedLayer,
     GroundLayer,
     BlockLayer,
     DeadLayer,
@@ -20,11 +21,13 @@ from layers import (
     WallLayer,
 )
 from commands import MoveCommand
-from popup import GameOverPopup, VictoryPopup
+from popup import GameOverPopup, VictoryPopup, SolvingPopup
 from history import HistoryManager
 from position import Position
 from algorithms import Algorithms
-from factories import DFSFactory, BFSFactory, UCSFactory, HillClimbFactory, AStarFactory
+from cache import SolutionCache
+from factories import create_factory
+from worker import SolverWorker
 
 
 class UserInterface(Observer):
@@ -117,11 +120,42 @@ class UserInterface(Observer):
             ),
         ]
 
+        (
+            ground_layer,
+            timer_layer,
+            lava_layer,
+            aqua_layer,
+            goal_layer,
+            block_layer,
+            player_layer,
+            dead_layer,
+            point_layer,
+            container_layer,
+            stone_layer,
+            wall_layer,
+        ) = self.layers
+        # Walls, containers, ground and the goal never change, so they are
+        # baked. Nothing can cover a wall, so walls go into the background
+        # with the ground. Liquids can flow over containers and the goal,
+        # so those are baked into an overlay drawn right above the liquids.
+        self.render_layers = [
+            BakedLayer([ground_layer, wall_layer], surface_flags=0),
+            timer_layer,
+            lava_layer,
+            aqua_layer,
+            BakedLayer([container_layer, goal_layer]),
+            block_layer,
+            player_layer,
+            dead_layer,
+            point_layer,
+            stone_layer,
+        ]
+
         self.commands = []
         self.player = self.state.player
         self.goal = self.state.goal
 
-        self.history = HistoryManager(max_history_size=100, state=self.state)
+        self.history = HistoryManager(max_history_size=None, state=self.state)
 
         self.state.clear_observers()
         for layer in reversed(self.layers):
@@ -149,9 +183,18 @@ class UserInterface(Observer):
         # Create popups
         self.game_over_popup = GameOverPopup(window_size)
         self.victory_popup = VictoryPopup(window_size)
+        self.solving_popup = SolvingPopup(window_size)
         self.paused = False
         self.popup_action = None
 
+        # Frames are only repainted after a state event; a full repaint is
+        # needed for the first frame, after a resize and under a popup
+        self.redraw_all = True
+        self.state_changed = False
+
+        # Search running in the background, if any
+        self.solver: SolverWorker | None = None
+
         self.clock = pygame.time.Clock()
         self.running = True
 
@@ -159,6 +202,29 @@ class UserInterface(Observer):
         events = pygame.event.get()
         mouse_pos = pygame.mouse.get_pos()
 
+        # The window can change under a popup or a running search too; the
+        # layers must not show stale surfaces once it is gone
+        for event in events:
+            if event.type == pygame.VIDEORESIZE:
+                for layer in self.render_layers:
+                    layer.invalidate()
+                self.redraw_all = True
+            elif event.type == pygame.VIDEOEXPOSE:
+                self.redraw_all = True
+
+        # While solving, only cancelling is possible; ESC stops the search
+        # and leaves the level to be played by hand
+        if self.solver is not None:
+            for event in events:
+                if event.type == pygame.QUIT:
+                    self.solver.cancel()
+                    self.popup_action = "menu"
+                    self.running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    self.solver.cancel()
+
+            return
+
         # Handle popup input first
         if self.paused:
             action = None
@@ -225,16 +291,50 @@ class UserInterface(Observer):
         self.commands.clear()
 
     def render(self):
+        # Popups react to hover or show live progress, so frames under a
+        # popup are always drawn in full
+        if self.redraw_all or self.paused or self.solving_popup.visible:
+            self.render_all()
+        elif self.state_changed:
+            self.render_dirty()
+        self.state_changed = False
+
+    def render_all(self):
         self.window.fill((0, 0, 0))
 
-        for layer in self.layers:
+        for layer in self.render_layers:
             layer.render(self.window)
+            # everything is on screen now, start tracking changes from here
+            layer.dirty_cells()
 
         # Draw popups on top
         self.game_over_popup.render(self.window)
         self.victory_popup.render(self.window)
+        self.solving_popup.render(self.window)
 
         pygame.display.update()
+        self.redraw_all = False
+
+    def render_dirty(self):
+        cells = set()
+        for layer in self.render_layers:
+            cells |= layer.dirty_cells()
+
+        rects = []
+        for cell in cells:
+            rect = pygame.Rect(
+                int(cell.x * self.cell_size.x),
+                int(cell.y * self.cell_size.y),
+                int(self.cell_size.x),
+                int(self.cell_size.y),
+            )
+            self.window.fill((0, 0, 0), rect)
+            for layer in self.render_layers:
+                layer.render_cell(self.window, cell)
+            rects.append(rect)
+
+        if rects:
+            pygame.display.update(rects)
 
     def perform_undo(self):
         if not self.history.can_undo():
@@ -266,6 +366,21 @@ class UserInterface(Observer):
 
         self.state.notify_state_restored()
 
+    def player_moved(self, player, move):
+        self.state_changed = True
+
+    def block_moved(self, block):
+        self.state_changed = True
+
+    def aqua_touched_lava(self, position):
+        self.state_changed = True
+
+    def lava_touched_aqua(self, position):
+        self.state_changed = True
+
+    def state_restored(self, new_state):
+        self.state_changed = True
+
     def player_died(self, player):
         self.paused = True
         self.game_over_popup.show()
@@ -274,30 +389,47 @@ class UserInterface(Observer):
         self.paused = True
         self.victory_popup.show()
 
-    def solve(self):
-        path = None
-        if self.solve_algo == Algorithms.DFS:
-            dfs = DFSFactory()
-            path = dfs.solve(self.state)
-        elif self.solve_algo == Algorithms.BFS:
-            bfs = BFSFactory()
-            path = bfs.solve(self.state)
-        elif self.solve_algo == Algorithms.UCS:
-            ucs = UCSFactory()
-            path = ucs.solve(self.state)
-        elif self.solve_algo == Algorithms.HILL_CLIMB:
-            hill_climb = HillClimbFactory()
-            path = hill_climb.solve(self.state)
-        elif self.solve_algo == Algorithms.A_STAR:
-            a_star = AStarFactory()
-            path = a_star.solve(self.state)
+    def start_solver(self):
+        factory = create_factory(self.solve_algo, SolutionCache())
+        if factory is None:
+            return
+
+        self.solver = SolverWorker(factory, self.state)
+        self.solving_popup.show()
+        self.solver.start()
+
+    def poll_solver(self):
+        """Show the search's progress; return its path once it is done"""
+        algorithm = self.solver.algorithm
+        if self.solver.is_alive():
+            self.solving_popup.set_progress(
+                [
+                    f"Nodes: {algorithm.get_nodes()}",
+                    f"Visited: {algorithm.get_visited_count()}",
+                    f"Frontier: {algorithm.get_frontier_size()}",
+                    f"Time: {self.solver.elapsed():.1f}s",
+                ]
+            )
+            return None
+
+        path = self.solver.path
+        self.solver = None
+        self.solving_popup.hide()
+        self.redraw_all = True
         return path
 
     def run(self):
-        path = self.solve()
+        self.start_solver()
+        path = None
         timer = 0
         while self.running:
             self.process_input()
+            if self.solver is not None:
+                path = self.poll_solver()
+                self.render()
+                # leave the search most of the interpreter while it runs
+                self.clock.tick(10)
+                continue
             if path and timer == 0:
                 self.commands.append(
                     MoveCommand(self.state, self.player, path.popleft())
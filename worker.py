@@ -0,0 +1,44 @@
+import threading
+import time
+from collections import deque
+
+from factories import AlgorithmFactory
+from position import Position
+from state import State
+
+
+class SolverWorker(threading.Thread):
+    """
+    Runs an AlgorithmFactory's search off the UI thread.
+
+    The search works on its own copy of the state. The UI polls the
+    algorithm's counters for progress and can stop it with `cancel()`;
+    a cancelled search leaves `path` as None.
+    """
+
+    def __init__(self, factory: AlgorithmFactory, state: State):
+        super().__init__(daemon=True)
+        self.factory = factory
+        self.state = state.copy()
+        self.algorithm = factory.create()
+        self.path: deque[Position] | None = None
+        self.start_time: float | None = None
+        self.end_time: float | None = None
+
+    def run(self):
+        self.start_time = time.perf_counter()
+        try:
+            path = self.factory.solve(self.state, self.algorithm)
+        finally:
+            self.end_time = time.perf_counter()
+        if not self.algorithm.cancelled:
+            self.path = path
+
+    def cancel(self):
+        self.algorithm.cancel()
+
+    def elapsed(self) -> float:
+        if self.start_time is None:
+            return 0.0
+        end_time = self.end_time if self.end_time is not None else time.perf_counter()
+        return end_time - self.start_time
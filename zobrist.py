@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+
+LAVA = 0
+AQUA = 1
+BLOCK = 2
+POINT = 3
+STONE = 4
+DEAD = 5
+TIMER = 6
+PLAYER = 7
+
+STATUS = {"alive": 0, "dead": 1, "won": 2}
+
+MASK = (1 << 64) - 1
+
+
+def splitmix64(value: int) -> int:
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+@lru_cache(maxsize=None)
+def key(kind: int, x, y, value: int = 0) -> int:
+    """
+    64-bit key for an entity of `kind` on cell (x, y).
+
+    `value` distinguishes per-cell variants such as a timer's duration or
+    the player's status. Keys are derived, not drawn from a random table,
+    so they are identical across processes.
+    """
+    return splitmix64(((value << 3 | kind) << 40) | (int(y) << 20) | int(x))